@@ -1,69 +1,90 @@
+import os
 import streamlit as st 
 import pandas as pd
 import re
 import numpy as np
 from st_aggrid import AgGrid
 from st_aggrid.grid_options_builder import GridOptionsBuilder
+from draft_board import PlayerTable, DraftBoard, create_roster, assign_player, get_score_components, score_board
+from draft_sim import search_candidates, get_survival_probabilities
+from pick_model import get_pick_model
+from draft_log import DraftLog
+
+PICK_MODEL_PATH = 'batch2_12_PPR_15/model' #Saved pick-position model (pick_model.save_pick_model), optional. Compile it with compiled_model.py so workers don't import scikit-learn/Keras
+DRAFT_LOG_PATH = 'draft_sessions.db'
 
 def initialize_teams(num_teams):
     for i in range(1,num_teams+1):
-        positions = ['QB', 'RB1', 'RB2', 'WR1', 'WR2', 'TE', 'FLEX', 'B1', 'B2', 'B3', 'B4', 'B5', 'B6', 'B7']
-        if f'{i}' not in st.session_state: st.session_state[f'{i}'] = {pos: None for pos in positions}
+        if f'{i}' not in st.session_state: st.session_state[f'{i}'] = create_roster()
+
+#Cleaned ADP rankings as a player table, read from the CSV once per server process and shared (read-only)
+#by every session's board
+@st.cache_resource
+def load_player_table():
+    df = pd.read_csv('FantasyPros_2022_Overall_ADP_Rankings.csv')
+    df = df.rename(columns={'AVG': 'ADP'})
+    df['POS'] = df['POS'].str.replace('\d+', '', regex=True)
+    df = df[df['POS'].isin(['QB', 'RB', 'WR', 'TE'])]
+    df = df[['Player','Team','Bye','POS','ADP']]
+    return PlayerTable(df.dropna(how='all'))
+
+@st.cache_resource
+def get_draft_log():
+    return DraftLog(DRAFT_LOG_PATH)
+
+#Appends an event to this session's draft log, starting a new logged draft (linked from the URL) if needed
+def log_draft_event(event_type, data=None):
+    if 'draft_id' not in st.session_state:
+        st.session_state.draft_id = get_draft_log().create_draft()
+        st.query_params['draft'] = st.session_state.draft_id
+    get_draft_log().append(st.session_state.draft_id, event_type, data)
+
+#Rebuilds a logged draft's board, rosters and settings into session state
+def restore_draft(draft_id):
+    state = get_draft_log().replay(draft_id)
+    st.session_state.draft_id = draft_id
+    st.session_state['num_teams'] = state['num_teams']
+    if state['num_teams']:
+        st.session_state['user_first_pick'] = state['user_first_pick'] or 0
+        initialize_teams(state['num_teams'])
+    board = st.session_state.board
+    for player, team in state['picks']:
+        st.session_state[team] = assign_player(st.session_state[team], player, board.get_position(player))
+        board.make_pick(player, team)
+    st.session_state['pick_num'] = len(state['picks']) + 1
 
 def handle_num_teams():
     if st.session_state.num_teams_key:
         st.session_state['num_teams'] = st.session_state.num_teams_key
         st.session_state['user_first_pick'] = 0 
+        log_draft_event('settings', {'num_teams': st.session_state.num_teams_key})
 
 def handle_user_first_pick():
     if st.session_state.ufp_key:
         st.session_state['user_first_pick'] = st.session_state.ufp_key
+        log_draft_event('settings', {'user_first_pick': st.session_state.ufp_key})
 
 def handle_make_pick():
     if st.session_state.pick_key: # If make pick button pressed
         st.session_state.pick_num = st.session_state.pick_num + 1 #Increment overall pick number
+        board = st.session_state.board
         #Moves picked player to the roster of the current team picking 
-        st.session_state[st.session_state.current_team_picking] = assign_player(st.session_state[st.session_state.current_team_picking], st.session_state.pick_sel_key, st.session_state.df)
-        #Removes picked player from dataframe
-        st.session_state.df = st.session_state.df[st.session_state.df['Player'] != st.session_state.pick_sel_key]
-
-def assign_player(team, player, df):
-    position = df.loc[df['Player'] == player, 'POS'].values[0]
-    if position == 'QB' and team['QB'] is None:
-        team['QB'] = player
-    elif position == 'RB':
-        if team['RB1'] is None:
-            team['RB1'] = player
-        elif team['RB2'] is None:
-            team['RB2'] = player
-        elif team['FLEX'] is None:
-            team['FLEX'] = player
-        else:
-            for i in range(1, 8):
-                if team[f'B{i}'] is None:
-                    team[f'B{i}'] = player
-                    break
-    elif position == 'WR':
-        if team['WR1'] is None:
-            team['WR1'] = player
-        elif team['WR2'] is None:
-            team['WR2'] = player
-        elif team['FLEX'] is None:
-            team['FLEX'] = player
-        else:
-            for i in range(1, 8):
-                if team[f'B{i}'] is None:
-                    team[f'B{i}'] = player
-                    break
-    elif position == 'TE' and team['TE'] is None:
-        team['TE'] = player
-    else:
-        for i in range(1, 8):
-            if team[f'B{i}'] is None:
-                team[f'B{i}'] = player
-                break
-    return team
-
+        st.session_state[st.session_state.current_team_picking] = assign_player(st.session_state[st.session_state.current_team_picking], st.session_state.pick_sel_key, board.get_position(st.session_state.pick_sel_key))
+        #Marks picked player as drafted on the board
+        board.make_pick(st.session_state.pick_sel_key, st.session_state.current_team_picking)
+        log_draft_event('pick', {'player': st.session_state.pick_sel_key, 'team': st.session_state.current_team_picking})
+
+def handle_undo_pick():
+    board = st.session_state.board
+    if board.picks:
+        player, team = board.undo_pick()
+        #Frees the roster slot the player was assigned to
+        roster = st.session_state[team]
+        for slot, value in roster.items():
+            if value == player:
+                roster[slot] = None
+        st.session_state.pick_num = st.session_state.pick_num - 1
+        log_draft_event('undo')
 
 def create_pick_order():
     pick_order = []
@@ -88,46 +109,56 @@ def is_starting_position(position, team):
     else:
         return False
 
-def teams_need_position(pos, teams_to_check):
-    count = 0 
-    for i in teams_to_check:
-        if pos == 'RB':
-            if st.session_state[f'{i}']['RB1'] is None or st.session_state[f'{i}']['RB2'] is None or (st.session_state[f'{i}']['FLEX'] is None and not st.session_state[f'{i}']['WR1'] and not st.session_state[f'{i}']['WR2']):
-                count += 1
-        elif pos == 'WR':
-            if st.session_state[f'{i}']['WR1'] is None or st.session_state[f'{i}']['WR2'] is None or (st.session_state[f'{i}']['FLEX'] is None and not st.session_state[f'{i}']['RB1'] and not st.session_state[f'{i}']['RB2']):
-                count += 1
-        else:  # For 'QB' and 'TE'
-            if st.session_state[f'{i}'][pos] is None:
-                count += 1
-    return count
-
-def calculate_scores(df, teams_to_check):
+def calculate_scores(teams_to_check):
     #df['Score'] = 1 / (df['AVG'] / (1 + df['POS'].apply(lambda pos: teams_need_position(pos,teams_to_check))))
 
     #Score = ADP_weight * (1/ADP) + VORP_weight * VORP + Position_weight * Position_Score + Team_Needs_weight * Team_Needs_Score
 
     #How can I account for position strats in draft, Teams that pick on the turn can manufacture runs on positions would that be a good strat(?)
 
-    #Difference in ADP between top position player and the worst case scenario player they'd have to draft instead
-    RB_VONA = df.loc[df['POS'] == 'RB', 'ADP'].iloc[0] - df.loc[df['POS'] == 'RB', 'ADP'].iloc[len(set(teams_to_check))] 
-    WR_VONA = df.loc[df['POS'] == 'WR', 'ADP'].iloc[0] - df.loc[df['POS'] == 'WR', 'ADP'].iloc[len(set(teams_to_check))] 
-    QB_VONA = df.loc[df['POS'] == 'QB', 'ADP'].iloc[0] - df.loc[df['POS'] == 'QB', 'ADP'].iloc[len(set(teams_to_check))]
-
-    conditions = [
-    df['POS'] == 'RB',
-    df['POS'] == 'WR',
-    df['POS'] == 'QB'
-    ]
-    values = [RB_VONA, WR_VONA, QB_VONA]
-
-    df['VONA'] = np.select(conditions, values)
-
-    df['PN'] = df['POS'].apply(lambda pos: teams_need_position(pos,teams_to_check))
-
-    df['Score'] = st.session_state.ADP_weight*((1/df['ADP'])*10) + st.session_state.VONA_weight*(df['VONA']) + st.session_state.positional_needs_weight*(df['PN'])
-
-    return df
+    board = st.session_state.board
+    weights = (st.session_state.ADP_weight, st.session_state.VONA_weight, st.session_state.positional_needs_weight)
+
+    #VONA and positional need only change when a pick is made, so they're cached per board state and
+    #moving a weight slider just re-weights the cached arrays. Scored boards are cached per weights too
+    components_key = (board.version, st.session_state.pick_num)
+    if st.session_state.get('score_components_key') != components_key:
+        rosters = [st.session_state[f'{i}'] for i in teams_to_check]
+        #Difference in ADP between top position player and the worst case scenario player they'd have to draft instead
+        st.session_state.score_components = get_score_components(board, rosters, len(set(teams_to_check)))
+        st.session_state.score_components_key = components_key
+        st.session_state.scores_cache = {}
+
+    if weights not in st.session_state.scores_cache:
+        vona, need = st.session_state.score_components
+        st.session_state.scores_cache[weights] = score_board(board, vona, need, weights)
+    return st.session_state.scores_cache[weights]
+
+#Plays out the rest of the draft for each suggested pick on a process pool, redrawing the table in placeholder
+#as batches finish. Stops at the time budget and keeps the best-so-far results until the board changes
+def simulate_picks(candidates, placeholder):
+    board = st.session_state.board
+    rosters = {f'{i}': st.session_state[f'{i}'] for i in range(1, st.session_state.num_teams + 1)}
+    for results in search_candidates(board, rosters, create_pick_order(), st.session_state.pick_num, candidates, budget = st.session_state.sim_budget_key):
+        st.session_state.sim_results = (board.version, results)
+        placeholder.dataframe(results, hide_index = True)
+
+#Chance each player is still on the board at the user's next pick, from the pick-position model. Computed
+#once per pick, or None if no saved model is available
+def calculate_survival(pick_order):
+    if not os.path.exists(PICK_MODEL_PATH):
+        return None
+    board = st.session_state.board
+    survival_key = (board.version, st.session_state.pick_num)
+    if st.session_state.get('survival_key') != survival_key:
+        user = pick_order[st.session_state.pick_num - 1]
+        later_picks = pick_order[st.session_state.pick_num:]
+        teams_before_next_pick = later_picks[:later_picks.index(user)] if user in later_picks else later_picks
+        rosters = {f'{i}': st.session_state[f'{i}'] for i in range(1, st.session_state.num_teams + 1)}
+        st.session_state.survival = get_survival_probabilities(board, rosters, teams_before_next_pick, len(later_picks),
+                                                               get_pick_model(PICK_MODEL_PATH), max_picks = len(pick_order))
+        st.session_state.survival_key = survival_key
+    return st.session_state.survival
 
 def get_teams_between_picks(pick_order):
     value = pick_order[st.session_state.pick_num]
@@ -176,22 +207,35 @@ def draft():
     if st.session_state.current_team_picking == 0: st.session_state.current_team_picking = 1 
 
     with draft_board_column:
-        undrafted_player_list = st.session_state.df['Player']
+        undrafted_player_list = st.session_state.board.get_available_df()['Player']
         selected_player = st.selectbox(f'With pick number {st.session_state.pick_num} in the draft, Team {st.session_state.current_team_picking} selected...', undrafted_player_list, key = 'pick_sel_key')
         st.button('Make pick', on_click = handle_make_pick, key = 'pick_key')
+        st.button('Undo last pick', on_click = handle_undo_pick, key = 'undo_key', disabled = not st.session_state.board.picks)
 
         if st.session_state.current_team_picking == st.session_state.user_first_pick:
             st.header("You're on the board!")
             st.write("Suggested picks are")
-            current_draft_board = st.session_state.df.copy(deep=True)
-            scores_df = calculate_scores(current_draft_board, get_teams_between_picks(pick_order))
+            scores_df = calculate_scores(get_teams_between_picks(pick_order))
             top_picks = scores_df.sort_values(by='Score', ascending=False).head(5)
 
+            survival = calculate_survival(pick_order)
+
             for _,row in top_picks.iterrows():
-                st.write(f"{row['Player']} ({row['POS']}) - Score: {row['Score']} {'*' if is_starting_position(row['POS'], st.session_state[st.session_state.current_team_picking]) else ''}")
+                survival_note = f" - {survival[st.session_state.board.get_player_id(row['Player'])]:.0%} chance to last to your next pick" if survival is not None else ''
+                st.write(f"{row['Player']} ({row['POS']}) - Score: {row['Score']} {'*' if is_starting_position(row['POS'], st.session_state[st.session_state.current_team_picking]) else ''}{survival_note}")
+
+            st.number_input('Simulation time budget (seconds)', min_value = 1, max_value = 55, value = 10, key = 'sim_budget_key')
+            simulate = st.button('Simulate rest of draft', key = 'sim_key')
+            st.write("Average starting lineup ADP after each pick (lower is better)")
+            sim_placeholder = st.empty()
+            sim_results = st.session_state.get('sim_results')
+            if simulate:
+                simulate_picks(list(top_picks['Player']), sim_placeholder)
+            elif sim_results is not None and sim_results[0] == st.session_state.board.version:
+                sim_placeholder.dataframe(sim_results[1], hide_index = True)
 
         st.header("Draft Board")
-        st.dataframe(st.session_state.df, use_container_width = True)
+        st.dataframe(st.session_state.board.get_available_df(), use_container_width = True)
 
     with team_info_column:
         with st.expander("Your Roster", expanded = False):
@@ -221,14 +265,12 @@ def main():
             footer {visibility: hidden;}
             </style>
             """
-    #Initialize and cleans dataframe
-    if 'df' not in st.session_state:
-        df = pd.read_csv('FantasyPros_2022_Overall_ADP_Rankings.csv')
-        df = df.rename(columns={'AVG': 'ADP'})
-        df['POS'] = df['POS'].str.replace('\d+', '', regex=True)
-        df = df[df['POS'].isin(['QB', 'RB', 'WR', 'TE'])]
-        df = df[['Player','Team','Bye','POS','ADP']]
-        st.session_state.df = df.dropna(how='all')
+    #Initialize the board, resuming the draft in the URL if there is one
+    if 'board' not in st.session_state:
+        st.session_state.board = DraftBoard(load_player_table())
+        draft_id = st.query_params.get('draft')
+        if draft_id is not None and get_draft_log().has_draft(draft_id):
+            restore_draft(draft_id)
     
     #Draft Control Variables
     if 'num_teams' not in st.session_state: st.session_state['num_teams'] = 0
@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fp_html_scrape
+
+#Times every installed HTML parser backend on the saved fixtures and checks each one extracts
+#exactly what the BeautifulSoup backend does. Usage: python benchmarks/bench_html_parsing.py [iterations]
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+DIRECTORY_URL = 'https://draftwizard.fantasypros.com/football/mock-drafts-directory/'
+
+def get_available_parsers():
+    parsers = ['bs4']
+    if fp_html_scrape.lxml is not None:
+        parsers.append('lxml')
+    if fp_html_scrape.SelectolaxParser is not None:
+        parsers.append('selectolax')
+    return parsers
+
+def load_fixture(filename):
+    with open(os.path.join(FIXTURES, filename), encoding='utf-8') as file:
+        return file.read()
+
+def get_parse_cases():
+    directory_html = load_fixture('mock_drafts_directory.html')
+    draft_html = load_fixture('mock_draft.html')
+    return {
+        'get_draft_urls': lambda parser: fp_html_scrape.parse_draft_urls(directory_html, DIRECTORY_URL, 12, 'PPR', 15, parser),
+        'scrape_draft_picks': lambda parser: fp_html_scrape.parse_draft_picks(draft_html, parser),
+    }
+
+#Raises if any backend's output differs from the bs4 backend on the fixtures
+def check_parser_equivalence(parsers=None):
+    for case, parse in get_parse_cases().items():
+        expected = parse('bs4')
+        for parser in parsers or get_available_parsers():
+            if parse(parser) != expected:
+                raise AssertionError(f'{parser} output differs from bs4 for {case}')
+
+#Returns {(case, parser): seconds per page}
+def time_parsers(iterations=50, parsers=None):
+    timings = {}
+    for case, parse in get_parse_cases().items():
+        for parser in parsers or get_available_parsers():
+            parse(parser)
+            start = time.perf_counter()
+            for _ in range(iterations):
+                parse(parser)
+            timings[(case, parser)] = (time.perf_counter() - start) / iterations
+    return timings
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    check_parser_equivalence()
+
+    timings = time_parsers(iterations)
+    for (case, parser), seconds in timings.items():
+        speedup = timings[(case, 'bs4')] / seconds
+        print(f'{case:<20} {parser:<12} {seconds * 1000:8.2f} ms/page  {speedup:5.1f}x')
+
+
+if __name__ == "__main__":
+    main()
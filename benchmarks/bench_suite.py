@@ -0,0 +1,209 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from functools import partial
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fp_html_scrape
+import model_preprocessing
+from draft_board import DraftBoard, create_roster, assign_player, get_score_components, score_board
+from bench_html_parsing import DIRECTORY_URL, get_available_parsers, load_fixture
+from load_test_drafts import make_players, get_pick_order
+
+#Benchmark suite for the hot paths: featurization, draft grading, board scoring and HTML parsing, each at
+#several scales on synthetic drafts and the saved HTML fixtures. Records time per call, throughput and peak
+#memory traced by tracemalloc (Python and NumPy allocations, not libxml2 or Lexbor internals), and compares
+#them against a baseline saved on the same machine in benchmarks/baseline.json (not committed: timings
+#from one machine say nothing about another). Save one with --save-baseline before making changes.
+#Usage: python benchmarks/bench_suite.py [--filter name] [--threshold 0.25] [--save-baseline]
+#Exits with status 1 if any case is slower (or uses more memory) than the baseline by more than the
+#threshold, and 2 if there's no baseline yet
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DRAFT_SCALES = {'small': (8, 10), 'medium': (12, 15), 'large': (16, 20)} #(teams, rounds)
+GRADING_SCALES = {'small': 10, 'medium': 100, 'large': 1000} #Drafts graded at once
+BOARD_SCALES = {'small': 300, 'medium': 600, 'large': 1200} #Players on the board
+HTML_SCALES = {'small': 1, 'medium': 4, 'large': 16} #Copies of the fixture rows per page
+MIN_MEMORY_REGRESSION_MB = 1 #Peak memory changes below this are noise
+
+POSITION_SHARES = {'QB': 0.12, 'RB': 0.3, 'WR': 0.34, 'TE': 0.1, 'DST': 0.07, 'K': 0.07}
+
+#Synthetic draft in the scraped CSV format. Players come from a pool of pool_size (default 1.5 players per
+#pick) and are drafted in order of a noisy ADP, with DST and K pushed to the late rounds
+def make_synthetic_draft(num_teams=12, num_rounds=15, pool_size=None, seed=0):
+    rng = np.random.default_rng(seed)
+    num_picks = num_teams * num_rounds
+    pool_size = pool_size or int(num_picks * 1.5)
+
+    positions = rng.choice(list(POSITION_SHARES), size=pool_size, p=list(POSITION_SHARES.values()))
+    adp = np.round(np.sort(rng.uniform(1, 2 * pool_size, pool_size)), 1)
+    adp = np.where(np.isin(positions, ['DST', 'K']), adp + pool_size, adp)
+    drafted = np.argsort(adp * np.exp(0.25 * rng.standard_normal(pool_size)), kind='stable')[:num_picks]
+
+    return pd.DataFrame({'pick_num': np.arange(1, num_picks + 1),
+                         'team_name': [f'Team{team}' for team in get_pick_order(num_teams, num_rounds)],
+                         'player': [f'Player {i}' for i in drafted], 'player_team': 'FA',
+                         'player_pos': positions[drafted], 'ADP': adp[drafted]})
+
+#Picks stacked into one table with a draft_id column, as grade_drafts takes them
+def make_synthetic_picks(num_drafts, num_teams=12, num_rounds=15):
+    return pd.concat([make_synthetic_draft(num_teams, num_rounds, seed=seed).assign(draft_id=seed) for seed in range(num_drafts)],
+                     ignore_index=True)
+
+#Board num_picks into a 12 team draft, with the rosters of the teams picking before the user's next turn
+def make_synthetic_board(pool_size, num_teams=12, num_picks=60):
+    board = DraftBoard(make_players(pool_size))
+    rosters = {team: create_roster() for team in range(1, num_teams + 1)}
+    pick_order = get_pick_order(num_teams, 20)
+    for team in pick_order[:num_picks]:
+        player = board.names[board.get_available_ids()[0]]
+        rosters[team] = assign_player(rosters[team], player, board.get_position(player))
+        board.make_pick(player, team)
+    teams_to_check = pick_order[num_picks + 1:num_picks + 2 * num_teams]
+    return board, [rosters[team] for team in teams_to_check], len(set(teams_to_check))
+
+#Repeats the section of html from the first start marker to the end of the last end marker
+def repeat_section(html, start, end, times):
+    section_start = html.index(start)
+    section_end = html.rindex(end) + len(end)
+    return html[:section_start] + html[section_start:section_end] * times + html[section_end:]
+
+def get_state_representations(df):
+    return [model_preprocessing.get_state_representation(df, pick_num, team) for pick_num, team in zip(df['pick_num'], df['team_name'])]
+
+def score_synthetic_board(board, rosters, depth):
+    vona, need = get_score_components(board, rosters, depth)
+    return score_board(board, vona, need, (50, 50, 50))
+
+#Case setups: build the inputs (not timed) and return the function to time
+
+def setup_draft_case(fn, num_teams, num_rounds):
+    return partial(fn, make_synthetic_draft(num_teams, num_rounds))
+
+def setup_grading_case(num_drafts):
+    return partial(model_preprocessing.grade_drafts, make_synthetic_picks(num_drafts))
+
+def setup_scoring_case(pool_size):
+    return partial(score_synthetic_board, *make_synthetic_board(pool_size))
+
+def setup_html_case(fn, fixture, start, end, times, *args):
+    return partial(fn, repeat_section(load_fixture(fixture), start, end, times), *args)
+
+#Returns {case name: (items per call, unit, setup)}
+def get_cases():
+    cases = {}
+    for scale, (num_teams, num_rounds) in DRAFT_SCALES.items():
+        num_picks = num_teams * num_rounds
+        cases[f'featurize_draft/{scale}'] = (num_picks, 'picks', partial(setup_draft_case, model_preprocessing.featurize_draft, num_teams, num_rounds))
+        cases[f'get_state_representation/{scale}'] = (num_picks, 'picks', partial(setup_draft_case, get_state_representations, num_teams, num_rounds))
+        cases[f'get_best_teams/{scale}'] = (1, 'drafts', partial(setup_draft_case, model_preprocessing.get_best_teams, num_teams, num_rounds))
+    for scale, num_drafts in GRADING_SCALES.items():
+        cases[f'grade_drafts/{scale}'] = (num_drafts, 'drafts', partial(setup_grading_case, num_drafts))
+    for scale, pool_size in BOARD_SCALES.items():
+        cases[f'calculate_scores/{scale}'] = (1, 'boards', partial(setup_scoring_case, pool_size))
+    for scale, times in HTML_SCALES.items():
+        for parser in get_available_parsers():
+            cases[f'parse_draft_urls[{parser}]/{scale}'] = (1, 'pages', partial(setup_html_case, fp_html_scrape.parse_draft_urls,
+                'mock_drafts_directory.html', '<tr class=', '</tr>', times, DIRECTORY_URL, 12, 'PPR', 15, parser))
+            cases[f'parse_draft_picks[{parser}]/{scale}'] = (1, 'pages', partial(setup_html_case, fp_html_scrape.parse_draft_picks,
+                'mock_draft.html', '<div class="PickedPlayer', '\n  </div>', times, parser))
+    return cases
+
+#Median seconds per call over at least min_repeats calls and min_time seconds, after one warm-up call
+def time_call(fn, min_time=0.5, min_repeats=5):
+    fn()
+    timings = []
+    start = time.perf_counter()
+    while len(timings) < min_repeats or time.perf_counter() - start < min_time:
+        call_start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - call_start)
+    return float(np.median(timings))
+
+#Peak memory traced during one call, in MB
+def measure_peak_memory(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+def run_suite(name_filter=None):
+    results = {}
+    for name, (items, unit, setup) in get_cases().items():
+        if name_filter and name_filter not in name:
+            continue
+        fn = setup()
+        seconds = time_call(fn)
+        results[name] = {'seconds': seconds, 'throughput': items / seconds, 'unit': unit + '/s', 'peak_mb': measure_peak_memory(fn)}
+        print_result(name, results[name])
+    return results
+
+def print_result(name, result):
+    print(f"{name:<38} {result['seconds'] * 1000:10.3f} ms {result['throughput']:12.1f} {result['unit']:<9} {result['peak_mb']:8.2f} MB")
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+def save_baseline(results, path=BASELINE_PATH):
+    baseline = load_baseline(path)
+    baseline.update(results)
+    with open(path, 'w') as file:
+        json.dump(baseline, file, indent=1, sort_keys=True)
+
+#Returns {case name: reason} for every case slower or more memory hungry than its baseline beyond threshold
+def find_regressions(results, baseline, threshold=0.25):
+    regressions = {}
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        time_ratio = result['seconds'] / baseline[name]['seconds']
+        memory_increase = result['peak_mb'] - baseline[name]['peak_mb']
+        if time_ratio > 1 + threshold:
+            regressions[name] = f'{time_ratio:.2f}x slower'
+        elif memory_increase > max(MIN_MEMORY_REGRESSION_MB, threshold * baseline[name]['peak_mb']):
+            regressions[name] = f'+{memory_increase:.1f} MB peak memory'
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark featurization, grading, scoring and HTML parsing')
+    parser.add_argument('--filter', help='only run cases whose name contains this')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown before a case counts as a regression')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    args = parser.parse_args()
+
+    if not args.save_baseline and not os.path.exists(args.baseline):
+        print(f'No baseline at {args.baseline}. Run with --save-baseline on this machine first, then again to compare')
+        sys.exit(2)
+
+    results = run_suite(args.filter)
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f'Saved baseline for {len(results)} cases to {args.baseline}')
+        return
+
+    baseline = load_baseline(args.baseline)
+    regressions = find_regressions(results, baseline, args.threshold)
+    print()
+    for name, result in results.items():
+        if name in baseline:
+            change = result['seconds'] / baseline[name]['seconds'] - 1
+            print(f"{name:<38} {change:+8.1%} vs baseline  {regressions.get(name, '')}")
+    if regressions:
+        print(f'\n{len(regressions)} regression(s) beyond {args.threshold:.0%}')
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
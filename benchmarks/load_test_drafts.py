@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+import resource
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from draft_board import PlayerTable, DraftBoard, create_roster, assign_player, get_score_components, score_board
+
+#Load test for server mode: many drafts running at once on one process, all sharing one PlayerTable.
+#Every pick does what an app rerun does: mark the pick, fill the roster and re-score the board.
+#Reports per-pick latency and process RSS, with per-draft memory taken after all the picks so it
+#includes the state a draft builds up. --per-draft-copy gives each draft its own table, as every
+#session did before the table was shared.
+#Usage: python benchmarks/load_test_drafts.py [--drafts 200] [--teams 12] [--rounds 14] [--threads 8]
+
+POSITION_SHARES = {'QB': 0.15, 'RB': 0.35, 'WR': 0.38, 'TE': 0.12}
+
+def get_rss_mb():
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10 #Peak, in KB on Linux
+
+#ADP table shaped like the cleaned FantasyPros rankings
+def make_players(num_players=600, seed=0):
+    rng = np.random.default_rng(seed)
+    positions = rng.choice(list(POSITION_SHARES), size=num_players, p=list(POSITION_SHARES.values()))
+    return pd.DataFrame({'Player': [f'Player {i}' for i in range(num_players)], 'Team': 'FA',
+                         'Bye': rng.integers(5, 15, num_players), 'POS': positions,
+                         'ADP': np.round(np.sort(rng.uniform(1, 400, num_players)), 1)})
+
+def get_pick_order(num_teams, num_rounds):
+    order = []
+    for round_num in range(num_rounds):
+        teams = range(1, num_teams + 1)
+        order.extend(teams if round_num % 2 == 0 else reversed(teams))
+    return order
+
+class LoadTestDraft:
+    def __init__(self, table, num_teams, seed):
+        self.board = DraftBoard(table)
+        self.rosters = {team: create_roster() for team in range(1, num_teams + 1)}
+        self.rng = np.random.default_rng(seed)
+
+    #One pick: a player near the top of the board, then the suggestions the app would show next
+    def make_pick(self, team, teams_to_check):
+        start = time.perf_counter()
+        available_ids = self.board.get_available_ids()
+        player = self.board.names[available_ids[min(int(self.rng.integers(0, 4)), len(available_ids) - 1)]]
+        self.rosters[team] = assign_player(self.rosters[team], player, self.board.get_position(player))
+        self.board.make_pick(player, team)
+
+        vona, need = get_score_components(self.board, [self.rosters[t] for t in teams_to_check], len(set(teams_to_check)))
+        score_board(self.board, vona, need, (50, 50, 50)).nlargest(5, 'Score')
+        return time.perf_counter() - start
+
+def run_load_test(num_drafts=200, num_teams=12, num_rounds=14, threads=8, per_draft_copy=False, seed=0):
+    players = make_players(seed=seed)
+    rss_start = get_rss_mb()
+
+    shared_table = PlayerTable(players)
+    drafts = [LoadTestDraft(PlayerTable(players.copy()) if per_draft_copy else shared_table, num_teams, seed + i)
+              for i in range(num_drafts)]
+    rss_drafts = get_rss_mb()
+
+    pick_order = get_pick_order(num_teams, num_rounds)
+    latencies = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for pick_index, team in enumerate(pick_order):
+            teams_to_check = pick_order[pick_index + 1:pick_index + 2 * num_teams]
+            latencies.extend(executor.map(lambda draft: draft.make_pick(team, teams_to_check), drafts))
+    elapsed = time.perf_counter() - start
+    rss_end = get_rss_mb()
+
+    latencies = np.array(latencies) * 1000
+    return {'drafts': num_drafts, 'picks': len(latencies), 'seconds': elapsed, 'picks_per_second': len(latencies) / elapsed,
+            'p50_ms': np.percentile(latencies, 50), 'p95_ms': np.percentile(latencies, 95), 'p99_ms': np.percentile(latencies, 99),
+            'rss_start_mb': rss_start, 'rss_drafts_mb': rss_drafts, 'rss_end_mb': rss_end,
+            'kb_per_draft_created': (rss_drafts - rss_start) * 1024 / num_drafts, 'kb_per_draft': (rss_end - rss_start) * 1024 / num_drafts}
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate many concurrent drafts sharing one player table')
+    parser.add_argument('--drafts', type=int, default=200)
+    parser.add_argument('--teams', type=int, default=12)
+    parser.add_argument('--rounds', type=int, default=14)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--per-draft-copy', action='store_true', help='give every draft its own player table')
+    args = parser.parse_args()
+
+    results = run_load_test(args.drafts, args.teams, args.rounds, args.threads, args.per_draft_copy)
+    print(f"{results['drafts']} drafts, {results['picks']} picks in {results['seconds']:.1f}s ({results['picks_per_second']:.0f} picks/s)")
+    print(f"pick latency   p50 {results['p50_ms']:.2f} ms  p95 {results['p95_ms']:.2f} ms  p99 {results['p99_ms']:.2f} ms")
+    print(f"RSS            start {results['rss_start_mb']:.1f} MB  drafts created {results['rss_drafts_mb']:.1f} MB  end {results['rss_end_mb']:.1f} MB")
+    print(f"per draft      {results['kb_per_draft']:.1f} KB after all picks ({results['kb_per_draft_created']:.1f} KB when created)")
+
+
+if __name__ == "__main__":
+    main()
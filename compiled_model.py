@@ -0,0 +1,205 @@
+import os
+import sys
+import json
+import numpy as np
+from pick_model import MODEL_META, load_pick_model
+from draft_dataset import load_dataset
+
+#NumPy-only copies of trained pick-position models, so the app can score draft states without importing
+#scikit-learn or Keras. A saved model folder (pick_model.save_pick_model) is compiled into one .npz:
+#
+#   forest   tree classifiers (RandomForest, ExtraTrees, DecisionTree) as flat node arrays. All trees are
+#            walked together, one level per step, with leaves pointing back at themselves
+#   network  Keras Sequential stacks of Dense and LSTM layers (plus Dropout/Flatten, which are no-ops at
+#            inference) as weight matrices, layer by layer
+#
+#Compiling checks the compiled predictor against the original model and records the file in the folder's
+#pick_model.json, after which pick_model.load_pick_model loads it instead of the original.
+#Usage: python compiled_model.py <saved model folder> [dataset store to check against]
+
+COMPILED_FILE = 'model.npz'
+TOLERANCE = 1e-5 #Max absolute difference in any probability between the compiled and original model
+CHECK_ROWS = 2000
+PREDICT_CHUNK = 1024 #Rows walked through the forest at once, bounds the (rows, trees) node arrays
+
+def softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0),
+    'sigmoid': lambda x: 1 / (1 + np.exp(-x)),
+    'tanh': np.tanh,
+    'softmax': softmax,
+}
+
+class CompiledForest:
+    def __init__(self, arrays):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.leaf = arrays['leaf']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.max_depth = int(arrays['max_depth'])
+
+    #(n, 32) states -> (n, n_classes) mean of the trees' leaf class fractions, as sklearn's predict_proba
+    def predict_proba(self, states):
+        #sklearn compares float32 features against float64 thresholds
+        states = np.asarray(states, dtype=np.float32).reshape(len(states), -1)
+        probabilities = np.empty((len(states), self.value.shape[1]), dtype=np.float32)
+        for start in range(0, len(states), PREDICT_CHUNK):
+            chunk = states[start:start + PREDICT_CHUNK]
+            rows = np.arange(len(chunk))[:, None]
+            nodes = np.broadcast_to(self.roots, (len(chunk), len(self.roots)))
+            for _ in range(self.max_depth):
+                nodes = np.where(chunk[rows, self.feature[nodes]] <= self.threshold[nodes], self.left[nodes], self.right[nodes])
+            probabilities[start:start + len(chunk)] = self.value[self.leaf[nodes]].mean(axis=1)
+        return probabilities
+
+class CompiledNetwork:
+    def __init__(self, arrays):
+        self.layers = []
+        for i, (layer_type, activation, recurrent_activation) in enumerate(zip(arrays['layer_types'], arrays['activations'], arrays['recurrent_activations'])):
+            weights = [arrays[f'layer{i}_{j}'] for j in range(int(arrays['weight_counts'][i]))]
+            self.layers.append((str(layer_type), ACTIVATIONS[str(activation)], ACTIVATIONS.get(str(recurrent_activation)), weights,
+                                bool(arrays['return_sequences'][i])))
+        self.sequence_input = bool(arrays['sequence_input'])
+
+    def predict_proba(self, states):
+        x = np.asarray(states, dtype=np.float32).reshape(len(states), -1)
+        if self.sequence_input:
+            x = x[:, None, :]
+        for layer_type, activation, recurrent_activation, weights, return_sequences in self.layers:
+            if layer_type == 'dense':
+                x = activation(x @ weights[0] + weights[1])
+            elif layer_type == 'lstm':
+                x = run_lstm(x, *weights, activation, recurrent_activation, return_sequences)
+            elif layer_type == 'flatten':
+                x = x.reshape(len(x), -1)
+        return x
+
+#Keras LSTM forward pass over (n, steps, features) inputs. Gates are packed in kernel columns as
+#input, forget, cell, output
+def run_lstm(x, kernel, recurrent_kernel, bias, activation, recurrent_activation, return_sequences):
+    units = recurrent_kernel.shape[0]
+    h = np.zeros((len(x), units), dtype=np.float32)
+    c = np.zeros((len(x), units), dtype=np.float32)
+    outputs = []
+    inputs = x @ kernel + bias #All steps' input projections at once
+    for step in range(x.shape[1]):
+        z = inputs[:, step] + h @ recurrent_kernel
+        i, f, o = recurrent_activation(z[:, :units]), recurrent_activation(z[:, units:2 * units]), recurrent_activation(z[:, 3 * units:])
+        c = f * c + i * activation(z[:, 2 * units:3 * units])
+        h = o * activation(c)
+        outputs.append(h)
+    return np.stack(outputs, axis=1) if return_sequences else h
+
+#Flattens a fitted sklearn tree classifier or tree ensemble into node arrays concatenated across trees
+def compile_forest(model):
+    trees = [estimator.tree_ for estimator in getattr(model, 'estimators_', [model])]
+    if any(tree.n_outputs != 1 for tree in trees):
+        raise ValueError('Only single-output tree classifiers can be compiled')
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+    is_leaf = np.concatenate([tree.children_left == -1 for tree in trees])
+    node_ids = np.arange(offsets[-1])
+
+    #Leaves get feature 0, an infinite threshold and themselves as both children, so every row can take
+    #max_depth steps and stays put once it reaches a leaf
+    left = np.where(is_leaf, node_ids, np.concatenate([tree.children_left + offset for tree, offset in zip(trees, offsets)]))
+    right = np.where(is_leaf, node_ids, np.concatenate([tree.children_right + offset for tree, offset in zip(trees, offsets)]))
+    value = np.concatenate([tree.value[:, 0, :] for tree in trees])[is_leaf]
+    totals = value.sum(axis=1, keepdims=True)
+    leaf = np.cumsum(is_leaf) - 1 #Node -> row of value, only meaningful for leaves
+    return {'kind': np.array('forest'),
+            'feature': np.where(is_leaf, 0, np.concatenate([tree.feature for tree in trees])).astype(np.int16),
+            'threshold': np.where(is_leaf, np.inf, np.concatenate([tree.threshold for tree in trees])),
+            'left': left.astype(np.int32), 'right': right.astype(np.int32), 'leaf': leaf.astype(np.int32),
+            'value': (value / np.where(totals == 0, 1, totals)).astype(np.float32),
+            'roots': offsets[:-1].astype(np.int32), 'max_depth': np.array(max(tree.max_depth for tree in trees))}
+
+#Copies the weights of a Keras Sequential model of Dense/LSTM layers
+def compile_network(model):
+    arrays = {'kind': np.array('network'), 'sequence_input': np.array(len(model.input_shape) == 3)}
+    layer_types, activations, recurrent_activations, weight_counts, return_sequences = [], [], [], [], []
+    for layer in model.layers:
+        layer_type = type(layer).__name__.lower()
+        config = layer.get_config()
+        if layer_type in ('dropout', 'inputlayer'):
+            continue
+        if layer_type not in ('dense', 'lstm', 'flatten'):
+            raise ValueError(f'Cannot compile {type(layer).__name__} layers')
+        if layer_type == 'lstm' and (config.get('go_backwards') or config.get('stateful')):
+            raise ValueError('Only forward, stateless LSTM layers can be compiled')
+        weights = [np.asarray(weight, dtype=np.float32) for weight in layer.get_weights()]
+        if layer_type in ('dense', 'lstm') and not config.get('use_bias', True):
+            weights.append(np.zeros(weights[0].shape[1], dtype=np.float32))
+        for activation in (config.get('activation', 'linear'), config.get('recurrent_activation', 'linear')):
+            if activation not in ACTIVATIONS:
+                raise ValueError(f'Cannot compile {activation} activations')
+        for j, weight in enumerate(weights):
+            arrays[f'layer{len(layer_types)}_{j}'] = weight
+        layer_types.append(layer_type)
+        activations.append(config.get('activation', 'linear'))
+        recurrent_activations.append(config.get('recurrent_activation', 'linear'))
+        weight_counts.append(len(weights))
+        return_sequences.append(config.get('return_sequences', False))
+    arrays.update(layer_types=np.array(layer_types), activations=np.array(activations), recurrent_activations=np.array(recurrent_activations),
+                  weight_counts=np.array(weight_counts), return_sequences=np.array(return_sequences))
+    return arrays
+
+def load_compiled_model(path):
+    with np.load(path) as file:
+        arrays = dict(file)
+    if arrays['kind'] == 'forest':
+        return CompiledForest(arrays)
+    return CompiledNetwork(arrays)
+
+#Draft states to check a compiled model on: rows from a dataset store if given, otherwise random states in
+#the ranges of real ones (slot and remaining counts, ADPs)
+def get_check_states(dataset_path=None, n=CHECK_ROWS, seed=0):
+    rng = np.random.default_rng(seed)
+    if dataset_path is not None:
+        inputs = load_dataset(dataset_path)['inputs']
+        return np.asarray(inputs[np.sort(rng.choice(len(inputs), min(n, len(inputs)), replace=False))])
+    states = rng.integers(0, 4, (n, 32)).astype(np.float32)
+    adp_columns = [8 + 4 * pos + offset for pos in range(6) for offset in (1, 2, 3)]
+    states[:, adp_columns] = np.round(rng.uniform(1, 300, (n, len(adp_columns))), 1)
+    return states
+
+#Compiles the model saved at path into path/model.npz, checks it against the original and records it in
+#the folder's metadata. Returns the largest probability difference seen
+def compile_pick_model(path, check_states=None):
+    original = load_pick_model(path, compiled=False)
+    arrays = compile_forest(original.model) if original.kind == 'sklearn' else compile_network(original.model)
+    tmp_path = os.path.join(path, 'model.tmp.npz')
+    np.savez(tmp_path, **arrays)
+
+    check_states = get_check_states() if check_states is None else check_states
+    difference = np.abs(load_compiled_model(tmp_path).predict_proba(check_states) - original.predict_proba(check_states)).max()
+    if difference > TOLERANCE:
+        os.remove(tmp_path)
+        raise ValueError(f'Compiled model differs from the original by {difference:.2g} (tolerance {TOLERANCE})')
+    os.replace(tmp_path, os.path.join(path, COMPILED_FILE))
+
+    with open(os.path.join(path, MODEL_META)) as file:
+        meta = json.load(file)
+    meta['compiled'] = COMPILED_FILE
+    with open(os.path.join(path, MODEL_META), 'w') as file:
+        json.dump(meta, file, indent=1)
+    return difference
+
+def main():
+    if len(sys.argv) < 2:
+        print('Usage: python compiled_model.py <saved model folder> [dataset store to check against]')
+        return
+    check_states = get_check_states(sys.argv[2] if len(sys.argv) > 2 else None)
+    difference = compile_pick_model(sys.argv[1], check_states)
+    size = os.path.getsize(os.path.join(sys.argv[1], COMPILED_FILE))
+    print(f'Compiled {sys.argv[1]} to {COMPILED_FILE} ({size / 2**20:.1f} MB), max difference {difference:.2g} over {len(check_states)} states')
+
+
+if __name__ == "__main__":
+    main()
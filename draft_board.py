@@ -0,0 +1,154 @@
+import numpy as np
+
+#Player table for one ADP source: ADP-sorted columns, a name index and per-position ids. It's never
+#modified after it's built, so every draft on the same source can share one (see DraftBoard)
+class PlayerTable:
+    def __init__(self, df):
+        self.players = df.sort_values('ADP', kind='stable').reset_index(drop=True)
+        self.names = self.players['Player'].to_numpy()
+        self.positions = self.players['POS'].to_numpy()
+        self.adp = self.players['ADP'].to_numpy(dtype=float)
+
+        self.player_ids = {}
+        for player_id, name in enumerate(self.names):
+            self.player_ids.setdefault(name, player_id)
+        self.position_ids = {pos: np.flatnonzero(self.positions == pos) for pos in dict.fromkeys(self.positions)}
+
+        for array in [self.names, self.positions, self.adp, *self.position_ids.values()]:
+            array.flags.writeable = False
+
+    def __len__(self):
+        return len(self.names)
+
+#Draft board state: a shared PlayerTable plus this draft's availability mask over it. Players are
+#looked up by id through the table's name index, and each position keeps its player ids in ADP order, so
+#picks, undo and lookups never copy or scan the whole board. Only the mask and pick list belong to the draft
+class DraftBoard:
+    def __init__(self, players):
+        table = players if isinstance(players, PlayerTable) else PlayerTable(players)
+        self.table = table
+        self.players = table.players
+        self.names = table.names
+        self.positions = table.positions
+        self.adp = table.adp
+        self.player_ids = table.player_ids
+        self.position_ids = table.position_ids
+
+        self.available = np.ones(len(table), dtype=bool)
+        self.picks = [] #(player_id, team) in pick order
+        self.version = 0 #Bumped on every change so cached results can tell the board moved on
+
+    def __len__(self):
+        return int(self.available.sum())
+
+    def get_player_id(self, player):
+        return self.player_ids[player]
+
+    def get_position(self, player):
+        return self.positions[self.player_ids[player]]
+
+    def is_available(self, player):
+        return bool(self.available[self.player_ids[player]])
+
+    def make_pick(self, player, team=None):
+        player_id = self.player_ids[player]
+        self.available[player_id] = False
+        self.picks.append((player_id, team))
+        self.version += 1
+        return player_id
+
+    #Puts the last pick back on the board. Returns (player name, team) of the undone pick
+    def undo_pick(self):
+        player_id, team = self.picks.pop()
+        self.available[player_id] = True
+        self.version += 1
+        return self.names[player_id], team
+
+    #Ids of available players at pos, best ADP first
+    def get_available_ids(self, pos=None):
+        if pos is None:
+            return np.flatnonzero(self.available)
+        ids = self.position_ids.get(pos, np.empty(0, dtype=int))
+        return ids[self.available[ids]]
+
+    #Undrafted players as a DataFrame. Built on demand and not kept, so a board only ever holds its mask
+    def get_available_df(self):
+        return self.players[self.available]
+
+#Rosters: one dict per team of slot -> player name (None while the slot is open)
+
+ROSTER_SLOTS = ['QB', 'RB1', 'RB2', 'WR1', 'WR2', 'TE', 'FLEX', 'B1', 'B2', 'B3', 'B4', 'B5', 'B6', 'B7']
+
+def create_roster():
+    return {slot: None for slot in ROSTER_SLOTS}
+
+def assign_player(team, player, position):
+    if position == 'QB' and team['QB'] is None:
+        team['QB'] = player
+    elif position == 'RB':
+        if team['RB1'] is None:
+            team['RB1'] = player
+        elif team['RB2'] is None:
+            team['RB2'] = player
+        elif team['FLEX'] is None:
+            team['FLEX'] = player
+        else:
+            for i in range(1, 8):
+                if team[f'B{i}'] is None:
+                    team[f'B{i}'] = player
+                    break
+    elif position == 'WR':
+        if team['WR1'] is None:
+            team['WR1'] = player
+        elif team['WR2'] is None:
+            team['WR2'] = player
+        elif team['FLEX'] is None:
+            team['FLEX'] = player
+        else:
+            for i in range(1, 8):
+                if team[f'B{i}'] is None:
+                    team[f'B{i}'] = player
+                    break
+    elif position == 'TE' and team['TE'] is None:
+        team['TE'] = player
+    else:
+        for i in range(1, 8):
+            if team[f'B{i}'] is None:
+                team[f'B{i}'] = player
+                break
+    return team
+
+#Scoring: Score = ADP_weight * (10 / ADP) + VONA_weight * VONA + PN_weight * PN for every available player
+
+#Counts the rosters (one per pick before the user's next turn, so repeats count twice) that still need a starter at pos
+def count_teams_needing(pos, rosters):
+    count = 0
+    for roster in rosters:
+        if pos == 'RB':
+            if roster['RB1'] is None or roster['RB2'] is None or (roster['FLEX'] is None and not roster['WR1'] and not roster['WR2']):
+                count += 1
+        elif pos == 'WR':
+            if roster['WR1'] is None or roster['WR2'] is None or (roster['FLEX'] is None and not roster['RB1'] and not roster['RB2']):
+                count += 1
+        elif pos in roster and roster[pos] is None:
+            count += 1
+    return count
+
+#Per-player VONA and positional need over the whole board, computed once per position. VONA is the ADP
+#gap between the best available RB/WR/QB and the one expected to be left after depth more picks
+def get_score_components(board, rosters, depth):
+    vona = np.zeros(len(board.players))
+    need = np.zeros(len(board.players))
+    for pos, ids in board.position_ids.items():
+        available_ids = board.get_available_ids(pos)
+        if pos in ['RB', 'WR', 'QB'] and len(available_ids):
+            vona[ids] = board.adp[available_ids[0]] - board.adp[available_ids[min(depth, len(available_ids) - 1)]]
+        need[ids] = count_teams_needing(pos, rosters)
+    return vona, need
+
+#Available players with VONA, PN and Score columns. weights is (ADP, VONA, positional need)
+def score_board(board, vona, need, weights):
+    adp_weight, vona_weight, positional_needs_weight = weights
+    ids = board.get_available_ids()
+    score = adp_weight*((1/board.adp[ids])*10) + vona_weight*vona[ids] + positional_needs_weight*need[ids]
+    return board.get_available_df().assign(VONA=vona[ids], PN=need[ids], Score=score)
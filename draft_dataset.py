@@ -0,0 +1,132 @@
+import os
+import json
+import numpy as np
+
+#Training set store: one directory holding compact, memory-mappable arrays split into appendable chunks
+#
+#   <path>/meta.json               positions, chunk names and row counts
+#   <path>/chunk_00000/inputs.npy  float32 (n, 32) state representations
+#   <path>/chunk_00000/outputs.npy int8 position code of the next pick (index into POSITIONS)
+#   <path>/chunk_00000/teams.npy   int8 team id of the team on the clock (Team1 -> 1)
+#   <path>/chunk_00000/best.npy    bool, True if that team finished among the draft's best teams
+#   <path>/chunk_00000/drafts.npy  int32 id of the draft each row came from
+
+POSITIONS = ['QB', 'RB', 'WR', 'TE', 'DST', 'K']
+DATASET_ARRAYS = {'inputs': np.float32, 'outputs': np.int8, 'teams': np.int8, 'best': np.bool_, 'drafts': np.int32}
+
+#Position strings -> int8 codes. Positions outside POSITIONS get -1
+def encode_positions(positions):
+    positions = np.asarray(positions)
+    codes = np.full(positions.shape, -1, dtype=np.int8)
+    for code, pos in enumerate(POSITIONS):
+        codes[positions == pos] = code
+    return codes
+
+def decode_positions(codes):
+    return np.array(POSITIONS + [''])[np.asarray(codes)]
+
+#'Team7' -> 7
+def encode_teams(teams):
+    return np.char.replace(np.asarray(teams, dtype=str), 'Team', '').astype(np.int8)
+
+def read_dataset_meta(path):
+    meta_path = os.path.join(path, 'meta.json')
+    if not os.path.exists(meta_path):
+        return {'positions': POSITIONS, 'chunks': []}
+    with open(meta_path) as file:
+        return json.load(file)
+
+def write_dataset_meta(path, meta):
+    tmp_path = os.path.join(path, 'meta.json.tmp')
+    with open(tmp_path, 'w') as file:
+        json.dump(meta, file, indent=1)
+    os.replace(tmp_path, os.path.join(path, 'meta.json'))
+
+#Writes arrays as a new chunk at the end of the store. Draft ids are offset so they stay unique across chunks
+def append_dataset(path, inputs, outputs, teams, best, drafts):
+    os.makedirs(path, exist_ok=True)
+    meta = read_dataset_meta(path)
+
+    chunk_name = f"chunk_{len(meta['chunks']):05d}"
+    draft_offset = sum(chunk['drafts'] for chunk in meta['chunks'])
+    arrays = {'inputs': inputs, 'outputs': outputs, 'teams': teams, 'best': best, 'drafts': np.asarray(drafts) + draft_offset}
+
+    os.makedirs(os.path.join(path, chunk_name), exist_ok=True)
+    for name, dtype in DATASET_ARRAYS.items():
+        np.save(os.path.join(path, chunk_name, name + '.npy'), np.ascontiguousarray(arrays[name], dtype=dtype))
+
+    num_drafts = int(arrays['drafts'].max()) + 1 - draft_offset if len(arrays['drafts']) else 0
+    meta['chunks'].append({'name': chunk_name, 'rows': len(inputs), 'drafts': num_drafts})
+    write_dataset_meta(path, meta)
+
+#Replaces whatever is stored at path with a single chunk
+def write_dataset(path, inputs, outputs, teams, best, drafts):
+    for chunk in read_dataset_meta(path)['chunks']:
+        for name in DATASET_ARRAYS:
+            os.remove(os.path.join(path, chunk['name'], name + '.npy'))
+        os.rmdir(os.path.join(path, chunk['name']))
+    if os.path.exists(os.path.join(path, 'meta.json')):
+        os.remove(os.path.join(path, 'meta.json'))
+    append_dataset(path, inputs, outputs, teams, best, drafts)
+
+#Yields one dict of arrays per chunk. With mmap_mode='r' nothing is read into memory until it's sliced
+def iter_dataset_chunks(path, mmap_mode='r'):
+    for chunk in read_dataset_meta(path)['chunks']:
+        yield {name: np.load(os.path.join(path, chunk['name'], name + '.npy'), mmap_mode=mmap_mode) for name in DATASET_ARRAYS}
+
+#Returns a dict of arrays for the whole store. A single-chunk store is returned as memory maps;
+#several chunks are concatenated into memory (use iter_dataset_chunks to avoid that)
+def load_dataset(path, mmap_mode='r'):
+    chunks = list(iter_dataset_chunks(path, mmap_mode))
+    if len(chunks) == 1:
+        return chunks[0]
+    if not chunks:
+        return {name: np.empty((0, 32) if name == 'inputs' else 0, dtype=dtype) for name, dtype in DATASET_ARRAYS.items()}
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in DATASET_ARRAYS}
+
+#Sequence windows for recurrent models: the trailing `window` states before and including each row, either
+#from the whole draft or only the rows where the same team was on the clock (by_team). Windows are strided
+#views into one contiguous block of states, so nothing is copied window times. Each row's window is the
+#view starting at starts[row]. Steps from another draft or team, or after the row, are padding: they're
+#flagged in the mask and zeroed when a batch is gathered. A masked LSTM (e.g. behind Keras' Masking layer)
+#skips them, so a window that starts at its draft's first row and runs past the current row (early picks)
+#works the same as a left-padded one. Team windows are in (draft, team) order: their row i is store row
+#order[i], so its label is outputs[order[i]]
+class SequenceWindows:
+    def __init__(self, inputs, drafts, window, teams=None):
+        self.window = window
+        #Team windows need each (draft, team)'s rows next to each other: one reordered copy of the states
+        if teams is None:
+            self.order = None
+            groups = np.asarray(drafts)
+        else:
+            self.order = np.lexsort((np.asarray(teams), np.asarray(drafts)))
+            inputs = np.asarray(inputs)[self.order]
+            groups = np.asarray(drafts)[self.order].astype(np.int64) * 256 + np.asarray(teams)[self.order]
+        if len(inputs) < window:
+            inputs = np.concatenate([inputs, np.zeros((window - len(inputs), inputs.shape[1]), dtype=inputs.dtype)])
+
+        self.inputs = inputs
+        self.num_rows = len(groups)
+        self.windows = np.lib.stride_tricks.sliding_window_view(inputs, window, axis=0).transpose(0, 2, 1)
+
+        rows = np.arange(self.num_rows)
+        new_group = np.r_[True, groups[1:] != groups[:-1]] if self.num_rows else np.empty(0, dtype=bool)
+        self.group_starts = np.flatnonzero(new_group)[np.cumsum(new_group) - 1]
+        self.starts = np.clip(np.maximum(self.group_starts, rows - window + 1), 0, len(self.windows) - 1)
+
+    def __len__(self):
+        return self.num_rows
+
+    #(len(rows), window) bool, True where a step is history of that row. rows index the windows' row order
+    #(store order, or self.order's order for team windows)
+    def get_mask(self, rows):
+        rows = np.asarray(rows)
+        steps = self.starts[rows, None] + np.arange(self.window)
+        return (steps >= self.group_starts[rows, None]) & (steps <= rows[:, None])
+
+    #(X, mask) for a batch of rows: X is (len(rows), window, n_features) with padding steps zeroed
+    def get_batch(self, rows):
+        rows = np.asarray(rows)
+        mask = self.get_mask(rows)
+        return self.windows[self.starts[rows]] * mask[:, :, None], mask
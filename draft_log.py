@@ -0,0 +1,92 @@
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+#Persisted draft sessions: every change to a draft is appended to an event log in SQLite, and the draft is
+#rebuilt by replaying it. Every SNAPSHOT_INTERVAL events the replayed state is saved as a snapshot, so a
+#reload only replays the events after the latest one. Events:
+#
+#   settings  {"num_teams": 12} or {"user_first_pick": 3}
+#   pick      {"player": "Justin Jefferson", "team": 3}
+#   undo      {}
+
+SNAPSHOT_INTERVAL = 50
+
+#Draft state as plain data: settings plus picks as [player, team] in pick order
+def get_empty_state():
+    return {'num_teams': 0, 'user_first_pick': None, 'picks': []}
+
+def apply_event(state, event_type, data):
+    if event_type == 'settings':
+        state.update(data)
+    elif event_type == 'pick':
+        state['picks'].append([data['player'], data['team']])
+    elif event_type == 'undo':
+        if state['picks']:
+            state['picks'].pop()
+    else:
+        raise ValueError(f'Unknown draft event type {event_type}')
+    return state
+
+class DraftLog:
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute('CREATE TABLE IF NOT EXISTS drafts (draft_id TEXT PRIMARY KEY, created_at REAL, updated_at REAL)')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS events (draft_id TEXT, seq INTEGER, type TEXT, data TEXT, created_at REAL, PRIMARY KEY (draft_id, seq))')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS snapshots (draft_id TEXT, seq INTEGER, state TEXT, PRIMARY KEY (draft_id, seq))')
+
+    def create_draft(self):
+        draft_id = uuid.uuid4().hex
+        with self.lock, self.conn:
+            self.conn.execute('INSERT INTO drafts VALUES (?, ?, ?)', (draft_id, time.time(), time.time()))
+        return draft_id
+
+    def has_draft(self, draft_id):
+        with self.lock:
+            return self.conn.execute('SELECT 1 FROM drafts WHERE draft_id = ?', (draft_id,)).fetchone() is not None
+
+    #Appends an event and returns its sequence number (1 for a draft's first event). Snapshots are built in
+    #the same transaction, from the events up to seq only, so a concurrent append can't leak into one
+    def append(self, draft_id, event_type, data=None):
+        with self.lock, self.conn:
+            seq = self.conn.execute('SELECT COALESCE(MAX(seq), 0) + 1 FROM events WHERE draft_id = ?', (draft_id,)).fetchone()[0]
+            self.conn.execute('INSERT INTO events VALUES (?, ?, ?, ?, ?)', (draft_id, seq, event_type, json.dumps(data or {}), time.time()))
+            self.conn.execute('UPDATE drafts SET updated_at = ? WHERE draft_id = ?', (time.time(), draft_id))
+            if seq % SNAPSHOT_INTERVAL == 0:
+                self.conn.execute('INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)', (draft_id, seq, json.dumps(self.build_state(draft_id, seq))))
+        return seq
+
+    #State after event up_to_seq: the latest snapshot at or before it plus the events after that. Caller holds the lock
+    def build_state(self, draft_id, up_to_seq):
+        row = self.conn.execute('SELECT seq, state FROM snapshots WHERE draft_id = ? AND seq <= ? ORDER BY seq DESC LIMIT 1',
+                                (draft_id, up_to_seq)).fetchone()
+        seq, state = (row[0], json.loads(row[1])) if row is not None else (0, get_empty_state())
+        for event_type, data in self.conn.execute('SELECT type, data FROM events WHERE draft_id = ? AND seq > ? AND seq <= ? ORDER BY seq',
+                                                  (draft_id, seq, up_to_seq)):
+            apply_event(state, event_type, json.loads(data))
+        return state
+
+    #(event_type, data) tuples after sequence number after_seq, in order
+    def get_events(self, draft_id, after_seq=0):
+        with self.lock:
+            rows = self.conn.execute('SELECT type, data FROM events WHERE draft_id = ? AND seq > ? ORDER BY seq', (draft_id, after_seq)).fetchall()
+        return [(event_type, json.loads(data)) for event_type, data in rows]
+
+    #Returns (seq, state) of the latest snapshot, or (0, empty state) if there isn't one
+    def get_latest_snapshot(self, draft_id):
+        with self.lock:
+            row = self.conn.execute('SELECT seq, state FROM snapshots WHERE draft_id = ? ORDER BY seq DESC LIMIT 1', (draft_id,)).fetchone()
+        if row is None:
+            return 0, get_empty_state()
+        return row[0], json.loads(row[1])
+
+    #Current state of a draft: the latest snapshot with the events after it applied
+    def replay(self, draft_id):
+        seq, state = self.get_latest_snapshot(draft_id)
+        for event_type, data in self.get_events(draft_id, seq):
+            apply_event(state, event_type, data)
+        return state
@@ -0,0 +1,232 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+import pandas as pd
+from draft_dataset import POSITIONS as MODEL_POSITIONS, encode_positions
+
+#Monte Carlo draft simulator: for each candidate pick, plays out the rest of the snake draft many times at
+#once. Every simulation is a row of NumPy arrays, so one step of the draft advances all of them together.
+#Opponents take the best available player by a noisy ADP (each simulation draws its own ADP noise), with
+#players at positions whose starting slots are already filled pushed down their board. The user's later
+#picks go to the best ADP at a position they still need. Lineups are valued by the ADP of the starting
+#lineup (QB, 2 RB, 2 WR, TE, FLEX), so lower is better
+
+POSITIONS = ['QB', 'RB', 'WR', 'TE']
+NO_NEED_PENALTY = 3.0 #How much further down the board players at already filled positions fall
+POOL_BUFFER = 60 #Players beyond the remaining number of picks that are still considered
+
+#Index into POSITIONS, or len(POSITIONS) for anything else
+def get_pos_code(pos):
+    return POSITIONS.index(pos) if pos in POSITIONS else len(POSITIONS)
+
+#(S, 4) bool: which positions each simulated roster still has an open starting slot (including FLEX) for
+def get_open_starters(counts):
+    qb, rb, wr, te = counts[..., 0], counts[..., 1], counts[..., 2], counts[..., 3]
+    flex_open = np.maximum(rb - 2, 0) + np.maximum(wr - 2, 0) < 1
+    return np.stack([qb < 1, (rb < 2) | flex_open, (wr < 2) | flex_open, te < 1], axis=-1)
+
+#Starting lineup ADP of every simulated roster. adp and pos_codes are (S, n) arrays of drafted players,
+#empty slots are filled with replacement_adp
+def get_lineup_adp(adp, pos_codes, replacement_adp):
+    lineup = np.zeros(len(adp))
+    leftovers = []
+    for code, starters in enumerate([1, 2, 2, 1]):
+        pos_adp = np.sort(np.where(pos_codes == code, adp, np.inf), axis=1)
+        pos_adp = np.pad(pos_adp, ((0, 0), (0, max(0, starters + 1 - pos_adp.shape[1]))), constant_values=np.inf)
+        lineup += np.where(np.isinf(pos_adp[:, :starters]), replacement_adp, pos_adp[:, :starters]).sum(axis=1)
+        if POSITIONS[code] in ['RB', 'WR']:
+            leftovers.append(pos_adp[:, starters])
+    flex = np.minimum(*leftovers)
+    return lineup + np.where(np.isinf(flex), replacement_adp, flex)
+
+#(n_candidates, n_sims) array of the user's simulated starting lineup ADP after taking each candidate.
+#rosters maps team number -> roster dict, pick_order is the full snake order (create_pick_order) and
+#pick_num the 1-based pick the user is on the clock for
+def simulate_lineups(board, rosters, pick_order, pick_num, candidates, n_sims=500, sigma=0.2, seed=None):
+    rng = np.random.default_rng(seed)
+    user = pick_order[pick_num - 1]
+    remaining_order = pick_order[pick_num:]
+
+    #Player pool: best available players by ADP, plus any candidate outside that range
+    candidate_ids = np.array([board.get_player_id(player) for player in candidates])
+    pool = board.get_available_ids()[:len(remaining_order) + POOL_BUFFER]
+    pool = np.concatenate([pool, np.setdiff1d(candidate_ids, pool)])
+    adp = board.adp[pool]
+    pos_codes = np.array([get_pos_code(pos) for pos in board.positions[pool]])
+    replacement_adp = board.adp.max() + 10
+
+    n_candidates = len(candidates)
+    n_total = n_candidates * n_sims
+    sims = np.arange(n_total)
+    sim_candidate = np.repeat(np.arange(n_candidates), n_sims)
+    candidate_slots = np.array([np.flatnonzero(pool == player_id)[0] for player_id in candidate_ids])
+
+    #Rosters so far, as per-team position counts (the extra column counts positions outside POSITIONS)
+    teams = sorted(set(pick_order))
+    team_index = {team: i for i, team in enumerate(teams)}
+    counts = np.zeros((n_total, len(teams), len(POSITIONS) + 1), dtype=np.int16)
+    user_adp = [[], []]
+    for team, roster in rosters.items():
+        for player in roster.values():
+            if player is not None and int(team) in team_index:
+                code = get_pos_code(board.get_position(player))
+                counts[:, team_index[int(team)], code] += 1
+                if int(team) == user:
+                    user_adp[0].append(np.full(n_total, board.adp[board.get_player_id(player)]))
+                    user_adp[1].append(np.full(n_total, code))
+
+    #The candidate is the user's pick in every simulation of its block
+    available = np.ones((n_total, len(pool)), dtype=bool)
+    picked = candidate_slots[sim_candidate]
+    available[sims, picked] = False
+    counts[sims, team_index[user], pos_codes[picked]] += 1
+    user_adp[0].append(adp[picked])
+    user_adp[1].append(pos_codes[picked])
+
+    noisy_adp = (adp * np.exp(sigma * rng.standard_normal((n_total, len(pool))))).astype(np.float32)
+    user_picks_left = sum(1 for team in remaining_order if team == user)
+
+    for team in remaining_order:
+        t = team_index[team]
+        open_starters = np.pad(get_open_starters(counts[:, t, :len(POSITIONS)]), ((0, 0), (0, 1)))
+        penalty = np.where(open_starters[:, pos_codes], 1, NO_NEED_PENALTY)
+        keys = np.where(available, (adp if team == user else noisy_adp) * penalty, np.inf)
+        choice = np.argmin(keys, axis=1)
+        available[sims, choice] = False
+        counts[sims, t, pos_codes[choice]] += 1
+
+        if team == user:
+            user_adp[0].append(adp[choice])
+            user_adp[1].append(pos_codes[choice])
+            user_picks_left -= 1
+            #Once every simulation has filled the user's starting lineup the remaining picks are bench depth
+            if user_picks_left == 0 or not get_open_starters(counts[:, t, :len(POSITIONS)]).any():
+                break
+
+    lineup_adp = get_lineup_adp(np.column_stack(user_adp[0]), np.column_stack(user_adp[1]), replacement_adp)
+    return lineup_adp.reshape(n_candidates, n_sims)
+
+#One row per candidate with the mean, standard deviation and 95% confidence interval of the mean
+#lineup ADP, best first. total and total_sq are per-candidate sums of lineup ADP and its square over n_sims
+def summarize_lineups(board, candidates, total, total_sq, n_sims):
+    mean = total / n_sims
+    std = np.sqrt(np.maximum(total_sq / n_sims - mean**2, 0))
+    margin = 1.96 * std / np.sqrt(n_sims)
+    positions = [board.get_position(player) for player in candidates]
+    results = pd.DataFrame({'Player': list(candidates), 'POS': positions, 'Lineup ADP': mean, 'Std': std,
+                            'CI Low': mean - margin, 'CI High': mean + margin, 'Sims': n_sims})
+    return results.sort_values('Lineup ADP', kind='stable').reset_index(drop=True)
+
+#Returns summarize_lineups for n_sims simulations of every candidate
+def simulate_candidates(board, rosters, pick_order, pick_num, candidates, n_sims=500, sigma=0.2, seed=None):
+    lineup_adp = simulate_lineups(board, rosters, pick_order, pick_num, candidates, n_sims, sigma, seed)
+    return summarize_lineups(board, candidates, lineup_adp.sum(axis=1), (lineup_adp**2).sum(axis=1), n_sims)
+
+#Anytime version of simulate_candidates for a pick clock: batches of batch_sims simulations run on a
+#process pool until budget seconds have passed (or max_sims per candidate are done). Yields the ranking
+#so far after every finished batch, so the last one yielded is the best-so-far answer when time runs out.
+#Batches still running at the deadline are abandoned rather than waited on
+def search_candidates(board, rosters, pick_order, pick_num, candidates, budget=10.0, batch_sims=100,
+                      max_sims=None, sigma=0.2, workers=None, seed=None):
+    deadline = time.monotonic() + budget
+    workers = workers or os.cpu_count()
+    seeds = np.random.SeedSequence(seed)
+    total = np.zeros(len(candidates))
+    total_sq = np.zeros(len(candidates))
+    n_sims = submitted = 0
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending = set()
+    try:
+        while True:
+            #Keep every worker busy with one batch queued behind it
+            while len(pending) < 2 * workers and (max_sims is None or submitted < max_sims):
+                pending.add(executor.submit(simulate_lineups, board, rosters, pick_order, pick_num, candidates,
+                                            batch_sims, sigma, seeds.spawn(1)[0]))
+                submitted += batch_sims
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not pending:
+                break
+
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                lineup_adp = future.result()
+                total += lineup_adp.sum(axis=1)
+                total_sq += (lineup_adp**2).sum(axis=1)
+                n_sims += lineup_adp.shape[1]
+            if done:
+                yield summarize_lineups(board, candidates, total, total_sq, n_sims)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+#Survival probabilities from the pick-position model: the teams picking before the user's next turn are
+#rolled forward n_sims times at once. Each step builds the on-the-clock team's 32 element state (as in
+#model_preprocessing.get_state_representation) for every simulation, runs one batched predict, samples a
+#position from the predicted probabilities and takes the best ADP player left at it
+
+#(S, 32) model states. available is (S, P) over the ADP-sorted pool, counts (S, 6) the team's players per
+#MODEL_POSITIONS, picks_left the number of picks left in the draft
+def get_model_states(available, pool_pos_codes, pool_adp, counts, picks_left, default_adp):
+    qb, rb, wr, te, dst, k = counts.T
+    flex = np.minimum(1, np.maximum(rb - 2, 0) + np.maximum(wr - 2, 0))
+    starters = [np.minimum(qb, 1), np.minimum(rb, 2), np.minimum(wr, 2), np.minimum(te, 1), flex, np.minimum(dst, 1), np.minimum(k, 1)]
+    bench = counts.sum(axis=1) - sum(starters)
+    columns = starters + [bench]
+
+    #Training states only count players who were drafted later on, approximated by the best picks_left players left
+    will_be_drafted = available & (np.cumsum(available, axis=1) <= picks_left)
+    for code in range(len(MODEL_POSITIONS)):
+        at_pos = available & (pool_pos_codes == code)
+        columns.append((will_be_drafted & at_pos).sum(axis=1))
+        pos_rank = np.cumsum(at_pos, axis=1)
+        for rank in range(1, 4):
+            first = np.argmax(pos_rank >= rank, axis=1)
+            columns.append(np.where(pos_rank[:, -1] >= rank, pool_adp[first], default_adp))
+    return np.column_stack(columns).astype(np.float32)
+
+#Probability each board player is still available at the user's next pick, as an array over board.players
+#(0 for players already drafted). teams_before_next_pick lists the team on the clock for every pick between
+#now and the user's next turn, picks_left is the number of picks left in the draft after the user's current one
+def get_survival_probabilities(board, rosters, teams_before_next_pick, picks_left, pick_model, n_sims=200,
+                               max_picks=None, seed=None):
+    rng = np.random.default_rng(seed)
+    survival = board.available.astype(float)
+    if not teams_before_next_pick:
+        return survival
+
+    pool = board.get_available_ids()[:picks_left + POOL_BUFFER]
+    pool_pos_codes = encode_positions(board.positions[pool])
+    pool_adp = board.adp[pool]
+    default_adp = board.adp[:max_picks or len(board.adp)].max() + 10
+    class_codes = encode_positions(pick_model.classes)
+
+    teams = sorted(set(teams_before_next_pick))
+    team_counts = np.zeros((len(teams), len(MODEL_POSITIONS)), dtype=int)
+    for t, team in enumerate(teams):
+        for player in rosters[str(team)].values():
+            if player is not None:
+                code = encode_positions([board.get_position(player)])[0]
+                if code >= 0:
+                    team_counts[t, code] += 1
+    counts = np.repeat(team_counts[None], n_sims, axis=0)
+
+    sims = np.arange(n_sims)
+    available = np.ones((n_sims, len(pool)), dtype=bool)
+    for step, team in enumerate(teams_before_next_pick):
+        t = teams.index(team)
+        states = get_model_states(available, pool_pos_codes, pool_adp, counts[:, t], picks_left - step, default_adp)
+        probabilities = np.asarray(pick_model.predict_proba(states), dtype=float)
+        cumulative = np.cumsum(probabilities / probabilities.sum(axis=1, keepdims=True), axis=1)
+        sampled = np.minimum((cumulative < rng.random((n_sims, 1))).sum(axis=1), len(class_codes) - 1)
+        pick_codes = class_codes[sampled]
+
+        #Positions missing from the board (e.g. DST and K in the app) still fill the team's roster
+        at_pos = available & (pool_pos_codes == pick_codes[:, None])
+        has_player = at_pos.any(axis=1)
+        available[sims[has_player], np.argmax(at_pos, axis=1)[has_player]] = False
+        valid = pick_codes >= 0
+        counts[sims[valid], t, pick_codes[valid]] += 1
+
+    survival[pool] = available.mean(axis=0)
+    return survival
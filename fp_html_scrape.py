@@ -1,47 +1,280 @@
 import requests 
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+import threading
+import sqlite3
+import gzip
+import json
+import sys
+import time
 import re 
 import os
 import csv
 import numpy as np 
 import pandas as pd 
-
-def get_draft_urls(base_url,num_teams,scoring_format,num_rounds):
+from pipeline_metrics import PipelineMetrics, measure_stage, run_with_profiling
+
+#Fetching: every request goes through one pooled keep-alive session with timeouts, retries with
+#backoff and a per-host rate limit, so pages can be fetched concurrently without hammering the site
+MAX_CONCURRENT_REQUESTS = 8
+REQUEST_TIMEOUT = 15
+MIN_REQUEST_INTERVAL = 0.1 #Seconds between requests to the same host
+HTML_PARSER = 'selectolax' if SelectolaxParser is not None else 'lxml' if lxml is not None else 'bs4'
+
+def create_session(pool_size=MAX_CONCURRENT_REQUESTS, retries=3, backoff_factor=0.5):
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=backoff_factor, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=['GET'])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+#Spaces out requests to each host by at least min_interval seconds, across all threads
+class HostRateLimiter:
+    def __init__(self, min_interval=MIN_REQUEST_INTERVAL):
+        self.min_interval = min_interval
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+default_session = None
+default_rate_limiter = HostRateLimiter()
+
+#With metrics, time spent throttled and fetching, HTTP status counts and bytes read are recorded
+def fetch_page(url, session=None, rate_limiter=None, metrics=None):
+    global default_session
+    if session is None:
+        if default_session is None:
+            default_session = create_session()
+        session = default_session
+    with measure_stage(metrics, 'throttle'):
+        (rate_limiter or default_rate_limiter).wait(url)
+    try:
+        with measure_stage(metrics, 'fetch'):
+            response = session.get(url, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException:
+        if metrics is not None:
+            metrics.count('http_errors')
+        raise
+    if metrics is not None:
+        metrics.count(f'http_{response.status_code}')
+        metrics.count('bytes_read', len(response.content))
+    response.raise_for_status()
+    return response.text
+
+#Runs fn on every item with a bounded thread pool. Returns results in input order; items whose
+#request still fails after retries, or whose page can't be parsed or ingested (e.g. an error page
+#without the expected table), are reported and come back as None so one bad page never stops the run
+def fetch_concurrently(fn, items, max_workers=MAX_CONCURRENT_REQUESTS):
+    def run(item):
+        try:
+            return fn(item)
+        except requests.RequestException as e:
+            print(f'Error occurred while fetching {item}: {e}')
+            return None
+        except Exception as e:
+            print(f'Error occurred while processing {item}: {type(e).__name__}: {e}')
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(run, items))
+
+#HTML parsing backends. selectolax and lxml parse pages in C and are picked automatically when installed;
+#'bs4' (BeautifulSoup's pure-Python html.parser) is the fallback. Each backend returns the same plain data
+
+#Returns (cell texts, href of the first link in the 7th cell) for every row of the directory table
+def parse_directory_rows(html, parser=None):
+    parser = parser or HTML_PARSER
+    rows = []
+
+    if parser == 'selectolax':
+        table = SelectolaxParser(html).css_first('table#draftListTable')
+        for row in table.css_first('tbody').css('tr'):
+            cells = row.css('td')
+            link = cells[6].css_first('a') if len(cells) > 6 else None
+            rows.append(([cell.text() for cell in cells], link.attributes.get('href') if link is not None else None))
+
+    elif parser == 'lxml':
+        tbody = lxml.html.fromstring(html).xpath("((//table[@id='draftListTable'])[1]//tbody)[1]")[0]
+        for row in tbody.iterdescendants('tr'):
+            cells = list(row.iterdescendants('td'))
+            link = next(cells[6].iterdescendants('a'), None) if len(cells) > 6 else None
+            rows.append(([cell.text_content() for cell in cells], link.get('href') if link is not None else None))
+
+    else:
+        soup = BeautifulSoup(html, 'html.parser')
+        for row in soup.find('table', {'id': 'draftListTable'}).find('tbody').find_all('tr'):
+            cells = row.find_all('td')
+            link = cells[6].find('a') if len(cells) > 6 else None
+            rows.append(([cell.text for cell in cells], link.get('href') if link is not None else None))
+
+    return rows
+
+#Returns (title, rank text) for every PickedPlayer div that has a Rank
+def parse_picked_players(html, parser=None):
+    parser = parser or HTML_PARSER
+    picked_players = []
+
+    if parser == 'selectolax':
+        for picked_player in SelectolaxParser(html).css('div.PickedPlayer'):
+            rank_div = picked_player.css_first('div.Rank')
+            if rank_div is not None:
+                picked_players.append((picked_player.attributes.get('title') or '', rank_div.text()))
+
+    elif parser == 'lxml':
+        has_class = "contains(concat(' ', normalize-space(@class), ' '), ' {} ')"
+        for picked_player in lxml.html.fromstring(html).xpath(f"//div[{has_class.format('PickedPlayer')}]"):
+            rank_div = picked_player.xpath(f".//div[{has_class.format('Rank')}]")
+            if rank_div:
+                picked_players.append((picked_player.get('title', ''), rank_div[0].text_content()))
+
+    else:
+        soup = BeautifulSoup(html, 'html.parser')
+        for picked_player in soup.find_all('div', {'class': 'PickedPlayer'}):
+            rank_div = picked_player.find('div', {'class': 'Rank'})
+            if rank_div is not None:
+                picked_players.append((picked_player.get('title', ''), rank_div.text))
+
+    return picked_players
+
+def parse_draft_urls(html, page_url, num_teams, scoring_format, num_rounds, parser=None):
     url_tups = []
 
-    response = requests.get(base_url)
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
-    table = soup.find('table', {'id': 'draftListTable'})
-    tbody = table.find('tbody')
-    rows = tbody.find_all('tr')
-    
-    for row in rows:
-        date = row.find_all('td')[0].text
-        scoring = row.find_all('td')[1].text
-        roster_settings = row.find_all('td')[2].text
-        teams = row.find_all('td')[3].text
-        rounds = row.find_all('td')[4].text
+    for cells, href in parse_directory_rows(html, parser):
+        date, scoring, roster_settings, teams, rounds = cells[:5]
         if str(num_teams) in teams and (str(scoring_format) in scoring and 'Half' not in scoring) and 'Default' in roster_settings and str(num_rounds) in rounds:
-            url_tups.append(("https://draftwizard.fantasypros.com" + row.find_all('td')[6].find('a')['href'],row.find_all('td')[6].find('a')['href']))
+            url_tups.append((urljoin(page_url, href), href))
     
     return url_tups
 
-def scrape_draft_picks(draft_url):
-    response = requests.get(draft_url)
-    soup = BeautifulSoup(response.text, 'html.parser')
-
-    draft_picks = []
-
-    for picked_player in soup.find_all('div', {'class': 'PickedPlayer'}):
-        title = picked_player.get('title', '')
-        link = picked_player.find('a', href=True)['href']
-        rank_div = picked_player.find('div', {'class': 'Rank'})
-        if rank_div is not None:
-            rank = rank_div.text.strip()
-            draft_picks.append({'title': title, 'rank': rank})
-    
-    return draft_picks
+def get_draft_urls(base_url,num_teams,scoring_format,num_rounds,session=None,metrics=None):
+    html = fetch_page(base_url, session, metrics=metrics)
+    with measure_stage(metrics, 'parse_directory'):
+        return parse_draft_urls(html, base_url, num_teams, scoring_format, num_rounds)
+
+#Fetches every directory page concurrently and returns their draft url tuples in page order, with
+#drafts listed on several pages only once. With an index, ?start= cursor pages visited on an earlier run
+#are skipped (the page without a cursor always lists the newest drafts, so it's fetched every run) and every
+#draft that hasn't been scraped yet is returned, including ones found on earlier runs
+def get_all_draft_urls(links,num_teams,scoring_format,num_rounds,session=None,index=None,metrics=None):
+    if index is not None:
+        links = [link for link in links if not is_cursor_page(link) or not index.is_page_visited(link)]
+
+    def get_page(link):
+        url_tups = get_draft_urls(link, num_teams, scoring_format, num_rounds, session, metrics)
+        if index is not None:
+            index.add_page(link, url_tups)
+        return url_tups
+
+    pages = fetch_concurrently(get_page, links)
+    if index is not None:
+        return index.get_pending_drafts()
+    return list(dict.fromkeys(tup for url_tups in pages if url_tups for tup in url_tups))
+
+def parse_draft_picks(html, parser=None):
+    return [{'title': title, 'rank': rank.strip()} for title, rank in parse_picked_players(html, parser)]
+
+def scrape_draft_picks(draft_url,session=None):
+    return parse_draft_picks(fetch_page(draft_url, session))
+
+#Scrapes every draft concurrently and saves each one as draft_<id>.csv in folder, cleaned through
+#ingest_draft when ingestion settings are given. Returns each file's status. With an index,
+#each draft's status is recorded as soon as it finishes so an interrupted run can pick up where it stopped.
+#With an archive, every fetched draft is also kept so ingestion can be replayed without scraping again.
+#With metrics, every stage is timed and each draft's end to end time is recorded
+def scrape_drafts(folder,url_tups,session=None,index=None,settings=None,archive=None,metrics=None):
+    def scrape(tup):
+        start = time.perf_counter()
+        link, filename = tup
+        filename = 'draft_' + get_draft_id(filename)
+        html = fetch_page(link, session, metrics=metrics)
+        with measure_stage(metrics, 'parse'):
+            draft_picks = parse_draft_picks(html)
+        if archive is not None:
+            with measure_stage(metrics, 'archive'):
+                archive.add(get_draft_id(tup[1]), link, draft_picks, html)
+        if settings is not None:
+            status = ingest_draft(filename, draft_picks, settings, metrics)
+        else:
+            with measure_stage(metrics, 'save'):
+                if draft_picks:
+                    save_to_csv(folder,filename,draft_picks)
+            status = 'done' if draft_picks else 'empty'
+        if index is not None:
+            index.set_draft_status(get_draft_id(tup[1]), status)
+        if metrics is not None:
+            metrics.record_item(filename, time.perf_counter() - start)
+        return status
+
+    #Drafts that couldn't be fetched, parsed or ingested come back as None
+    statuses = ['failed' if status is None else status for status in fetch_concurrently(scrape, url_tups)]
+    if index is not None:
+        for tup, status in zip(url_tups, statuses):
+            if status == 'failed':
+                index.set_draft_status(get_draft_id(tup[1]), 'failed')
+    return {'draft_' + get_draft_id(tup[1]): status for tup, status in zip(url_tups, statuses)}
+
+def is_cursor_page(url):
+    return 'start=' in urlparse(url).query
+
+def get_draft_id(href):
+    return href.rstrip('/').split('/')[-1]
+
+#Persistent record of visited directory pages and scraped drafts, kept in SQLite next to the data folder
+#(not inside it, since the cleaning steps treat every file in the folder as a draft)
+class ScrapeIndex:
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute('CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, visited_at REAL)')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS drafts (draft_id TEXT PRIMARY KEY, url TEXT, href TEXT, status TEXT, updated_at REAL)')
+
+    def is_page_visited(self, url):
+        with self.lock:
+            return self.conn.execute('SELECT 1 FROM pages WHERE url = ?', (url,)).fetchone() is not None
+
+    #Records the drafts listed on a page and, for cursor pages, marks the page visited in one transaction.
+    #Drafts already in the index keep their status, so re-fetched pages don't queue them again
+    def add_page(self, url, url_tups):
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO drafts VALUES (?, ?, ?, 'pending', ?)",
+                                  [(get_draft_id(href), link, href, time.time()) for link, href in url_tups])
+            if is_cursor_page(url):
+                self.conn.execute('INSERT OR REPLACE INTO pages VALUES (?, ?)', (url, time.time()))
+
+    def set_draft_status(self, draft_id, status):
+        with self.lock, self.conn:
+            self.conn.execute('UPDATE drafts SET status = ?, updated_at = ? WHERE draft_id = ?', (status, time.time(), draft_id))
+
+    #Drafts that are pending or failed on an earlier run, as (url, href) tuples
+    def get_pending_drafts(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT url, href FROM drafts WHERE status IN ('pending', 'failed') ORDER BY rowid").fetchall()
+        return [tuple(row) for row in rows]
 
 def save_to_csv(folder,filename, data):
     if not os.path.exists(folder):
@@ -53,7 +286,8 @@ def save_to_csv(folder,filename, data):
         dict_writer.writeheader()
         dict_writer.writerows(data)
 
-def clean_data(folder,scoring_format):
+#Returns player name -> ADP for the scoring format, and the ADP given to players without one
+def load_adp_dict(scoring_format):
     adp_df_path = f'./{scoring_format}.csv'
     
     df = pd.read_csv(adp_df_path)
@@ -63,114 +297,198 @@ def clean_data(folder,scoring_format):
     default_adp = df['ADP'].max() + 10
 
     adp_dict = df.set_index('player')['ADP'].to_dict()
-    
-    for filename in os.listdir(folder):
-        cleaned_rows = []
-        with open(os.path.join(folder, filename), 'r') as file:
-            csv_reader = csv.reader(file)
-            next(csv_reader)
-            for row in csv_reader:
-                row_string = row[0]
-                match = re.match(r'Pick #(\d+) by (.*?): (.*?) \((.*?) - (.*?)\)', row_string)
-                if match:
-                    pick_order = match.group(1)
-                    team_name = match.group(2)
-                    player_name = match.group(3)
-                    player_team = match.group(4)
-                    player_position = match.group(5)
-
-                    if player_name in adp_dict.keys():
-                        adp = adp_dict[player_name]
-                    else:
-                        adp = default_adp #Do not have ADP values for Kickers and DST 
-                        #print(f'Assigned Default ADP to: {player_name}')
-                    cleaned_row = [pick_order, team_name, player_name, player_team, player_position,adp]
-                    cleaned_rows.append(cleaned_row)
-        if cleaned_rows:
-            with open(os.path.join(folder, filename), 'w', newline='') as file:
-                writer = csv.writer(file)
-                writer.writerows(cleaned_rows)
-
-def add_headers(folder):
+    return adp_dict, default_adp
+
+#Parses a pick title ("Pick #1 by Team: Player (Team - POS)") into a cleaned row, or None if it doesn't match
+def parse_pick_title(row_string, adp_dict, default_adp):
+    match = re.match(r'Pick #(\d+) by (.*?): (.*?) \((.*?) - (.*?)\)', row_string)
+    if not match:
+        return None
+    pick_order = match.group(1)
+    team_name = match.group(2)
+    player_name = match.group(3)
+    player_team = match.group(4)
+    player_position = match.group(5)
+
+    if player_name in adp_dict.keys():
+        adp = adp_dict[player_name]
+    else:
+        adp = default_adp #Do not have ADP values for Kickers and DST 
+        #print(f'Assigned Default ADP to: {player_name}')
+    return [pick_order, team_name, player_name, player_team, player_position,adp]
+
+#Single-pass ingestion: takes a draft's raw picks through parsing, the ADP join, team encoding and
+#validation in memory, then writes the clean file once. Invalid drafts are quarantined instead of
+#prompting to delete them
+
+#Everything ingest_draft needs to clean and validate drafts for one dataset folder
+def get_ingest_settings(folder,scoring_format,num_teams,num_rounds):
+    adp_dict, default_adp = load_adp_dict(scoring_format)
+    return {'folder': folder, 'quarantine_folder': folder.rstrip('/') + '_quarantine',
+            'adp_dict': adp_dict, 'default_adp': default_adp, 'num_teams': num_teams, 'num_rounds': num_rounds}
+
+#Returns the cleaned draft as a DataFrame and None, or None and the reason the draft is invalid
+def clean_draft(draft_picks, adp_dict, default_adp, num_teams, num_rounds):
+    df = build_draft_df(draft_picks, adp_dict, default_adp)
+    if df is None:
+        return None, 'No picks found'
+    return validate_draft(df, num_teams, num_rounds)
+
+#Parses scraped pick records into a draft DataFrame with ADPs, or None if there are no picks
+def build_draft_df(draft_picks, adp_dict, default_adp):
     header = ['pick_num', 'team_name', 'player', 'player_team', 'player_pos','ADP']
-    for filename in os.listdir(folder):
-        if not os.path.isdir(os.path.join(folder, filename)): 
-            file_path = os.path.join(folder, filename)
-            with open(file_path, 'r') as file:
-                lines = file.readlines()
-            lines.insert(0, ','.join(header) + '\n')
-            with open(file_path, 'w') as file:
-                file.writelines(lines)
-
-def check_num_teams(folder, num_teams):
-    error_files = []
-
-    for filename in os.listdir(folder):
-        if not os.path.isdir(os.path.join(folder, filename)):
-            file_path = os.path.join(folder, filename)
-            df = pd.read_csv(file_path)  
-            teams = df['team_name'].unique()
-            if len(teams) != num_teams:
-                error_files.append(filename)
-    
-    if len(error_files) > 0:
-        print(f"Wrong number of teams in {len(error_files)} of {len(os.listdir(folder))} files checked")
-
-        for filename in error_files:
-            file_path = os.path.join(folder,filename)
-            df = pd.read_csv(file_path)
-            teams = df['team_name'].unique()
-            print(f"File '{filename}': Number of unique teams is {len(teams)}, expected {num_teams}.")
-
-            confirmation = input('Delete file? (Y/N):')
-            if confirmation.upper() == 'Y':
-                try:
-                    os.remove(file_path)
-                    print(f"File '{file_path}' successfully deleted.")
-                except OSError as e:
-                    print(f'Error occurred while deleting file: {e}')
-            else:
-                print(f"File '{file_path}' will not be deleted.")
- 
-def encode_team_names(folder):
-    for filename in os.listdir(folder):
-        if not os.path.isdir(os.path.join(folder,filename)):
-            file_path = os.path.join(folder,filename)
-            df = pd.read_csv(file_path)
-            teams = df['team_name'].unique()
-            team_mapping = {team: f'Team{i+1}' for i, team in enumerate(teams)}
-            df['team_name'] = df['team_name'].map(team_mapping)
-            df.to_csv(file_path,index = False)
-
-def check_pick_order(folder, num_teams, num_rounds):
-    error_files = []
-
-    for filename in os.listdir(folder):
-        if not os.path.isdir(os.path.join(folder,filename)):
-            file_path = os.path.join(folder,filename)
-            df = pd.read_csv(file_path)
-            expected_draft_order = (list(range(1,(num_teams+1))) + list(range(num_teams,0,-1)))*num_rounds
-            expected_draft_order = expected_draft_order[:int(len(expected_draft_order)/2)]
-            draft_order_in_file = [int(''.join(filter(str.isdigit, element))) for element in df['team_name']]
-
-            if expected_draft_order != draft_order_in_file:
-                error_files.append(filename)
-
-    if len(error_files) > 0:
-        print(f"Draft order doesn't match expected draft order in {len(error_files)}/{len(os.listdir(folder))} files checked")
-
-        for filename in error_files:
-            print(f"File '{filename}': Draft order incorrect")
-            file_path = os.path.join(folder,filename)
-            confirmation = input('Delete file? (Y/N):')
-            if confirmation.upper() == 'Y':
-                try:
-                    os.remove(file_path)
-                    print(f"File '{file_path}' successfully deleted.")
-                except OSError as e:
-                    print(f'Error occurred while deleting file: {e}')
-            else:
-                print(f"File '{file_path}' will not be deleted.")
+    rows = [parse_pick_title(pick['title'], adp_dict, default_adp) for pick in draft_picks]
+    rows = [row for row in rows if row]
+    if not rows:
+        return None
+
+    df = pd.DataFrame(rows, columns=header)
+    df['pick_num'] = df['pick_num'].astype(int)
+    df['ADP'] = df['ADP'].astype(float)
+    return df
+
+#Checks the team count and snake pick order, renaming teams Team1..TeamN in pick order.
+#Returns the draft and None, or None and the reason the draft is invalid
+def validate_draft(df, num_teams, num_rounds):
+    teams = df['team_name'].unique()
+    if len(teams) != num_teams:
+        return None, f'Number of unique teams is {len(teams)}, expected {num_teams}'
+
+    team_mapping = {team: f'Team{i+1}' for i, team in enumerate(teams)}
+    df['team_name'] = df['team_name'].map(team_mapping)
+
+    expected_draft_order = (list(range(1,(num_teams+1))) + list(range(num_teams,0,-1)))*num_rounds
+    expected_draft_order = expected_draft_order[:int(len(expected_draft_order)/2)]
+    draft_order_in_file = [int(team_name[len('Team'):]) for team_name in df['team_name']]
+    if expected_draft_order != draft_order_in_file:
+        return None, 'Draft order incorrect'
+
+    return df, None
+
+#Cleans and writes one draft. Invalid drafts are saved raw to the quarantine folder instead.
+#Returns 'done' or 'invalid: <reason>'
+def ingest_draft(filename, draft_picks, settings, metrics=None):
+    with measure_stage(metrics, 'clean'):
+        df = build_draft_df(draft_picks, settings['adp_dict'], settings['default_adp'])
+    error = 'No picks found' if df is None else None
+    if df is not None:
+        with measure_stage(metrics, 'validate'):
+            df, error = validate_draft(df, settings['num_teams'], settings['num_rounds'])
+    if error is not None:
+        if draft_picks:
+            save_to_csv(settings['quarantine_folder'], filename, draft_picks)
+        if metrics is not None:
+            metrics.count('invalid_drafts')
+        return f'invalid: {error}'
+
+    os.makedirs(settings['folder'], exist_ok=True)
+    file_path = os.path.join(settings['folder'], filename)
+    with measure_stage(metrics, 'save'):
+        df.to_csv(file_path, index=False)
+    if metrics is not None:
+        metrics.count('bytes_written', os.path.getsize(file_path))
+    return 'done'
+
+#Ingests raw title/rank CSVs (as written by get_raw_data) from raw_folder into settings['folder']
+def ingest_folder(raw_folder, settings):
+    statuses = {}
+    for filename in sorted(os.listdir(raw_folder)):
+        if not os.path.isdir(os.path.join(raw_folder, filename)):
+            with open(os.path.join(raw_folder, filename), 'r', newline='') as file:
+                draft_picks = list(csv.DictReader(file))
+            statuses[filename] = ingest_draft(filename, draft_picks, settings)
+    return statuses
+
+#Prints a summary of ingestion results and every invalid draft
+def report_ingestion(statuses):
+    invalid = {filename: status for filename, status in statuses.items() if status and status.startswith('invalid')}
+    failed = [filename for filename, status in statuses.items() if status == 'failed']
+    print(f"Ingested {len(statuses) - len(invalid) - len(failed)} drafts, quarantined {len(invalid)} invalid drafts, {len(failed)} failed")
+    for filename, status in invalid.items():
+        print(f"File '{filename}': {status[len('invalid: '):]}")
+
+#Raw draft archive: every fetched draft's pick records (and optionally its HTML) appended as one
+#compressed frame per draft to size-capped shard files, with an SQLite index by draft id. Frames are
+#zstd when the zstandard package is installed and gzip otherwise
+ARCHIVE_SHARD_SIZE = 256 * 1024 * 1024
+
+class DraftArchive:
+    def __init__(self, path, store_html=True):
+        self.path = path
+        self.store_html = store_html
+        self.codec = 'zstd' if zstandard is not None else 'gzip'
+        self.lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(path, 'index.db'), check_same_thread=False)
+        with self.conn:
+            self.conn.execute('CREATE TABLE IF NOT EXISTS records (draft_id TEXT PRIMARY KEY, shard TEXT, offset INTEGER, length INTEGER, codec TEXT)')
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+
+    def compress(self, data):
+        if self.codec == 'zstd':
+            return zstandard.ZstdCompressor().compress(data)
+        return gzip.compress(data)
+
+    @staticmethod
+    def decompress(data, codec):
+        if codec == 'zstd':
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    #Shard that the next frame goes to: the newest one unless it's full
+    def get_current_shard(self):
+        extension = '.jsonl.zst' if self.codec == 'zstd' else '.jsonl.gz'
+        shards = sorted(filename for filename in os.listdir(self.path) if filename.endswith(extension))
+        if shards and os.path.getsize(os.path.join(self.path, shards[-1])) < ARCHIVE_SHARD_SIZE:
+            return shards[-1]
+        return f'shard_{len(shards):05d}{extension}'
+
+    def add(self, draft_id, url, draft_picks, html=None):
+        record = {'draft_id': draft_id, 'url': url, 'fetched_at': time.time(), 'picks': draft_picks}
+        if self.store_html and html is not None:
+            record['html'] = html
+        frame = self.compress((json.dumps(record) + '\n').encode('utf-8'))
+
+        with self.lock:
+            shard = self.get_current_shard()
+            with open(os.path.join(self.path, shard), 'ab') as file:
+                offset = file.tell()
+                file.write(frame)
+            with self.conn:
+                self.conn.execute('INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)', (draft_id, shard, offset, len(frame), self.codec))
+
+    def read_frame(self, shard, offset, length, codec):
+        with open(os.path.join(self.path, shard), 'rb') as file:
+            file.seek(offset)
+            return json.loads(self.decompress(file.read(length), codec))
+
+    def get(self, draft_id):
+        with self.lock:
+            row = self.conn.execute('SELECT shard, offset, length, codec FROM records WHERE draft_id = ?', (draft_id,)).fetchone()
+        return self.read_frame(*row) if row is not None else None
+
+    #Yields the latest record of every archived draft, reading each shard front to back
+    def iter_records(self):
+        with self.lock:
+            rows = self.conn.execute('SELECT shard, offset, length, codec FROM records ORDER BY shard, offset').fetchall()
+        for shard, offset, length, codec in rows:
+            yield self.read_frame(shard, offset, length, codec)
+
+#Re-runs ingestion for every archived draft. With reparse set, picks are re-extracted from the archived HTML
+def replay_archive(archive, settings, reparse=False, metrics=None):
+    statuses = {}
+    for record in archive.iter_records():
+        start = time.perf_counter()
+        with measure_stage(metrics, 'parse'):
+            draft_picks = parse_draft_picks(record['html']) if reparse and 'html' in record else record['picks']
+        filename = 'draft_' + record['draft_id']
+        statuses[filename] = ingest_draft(filename, draft_picks, settings, metrics)
+        if metrics is not None:
+            metrics.record_item(filename, time.perf_counter() - start)
+    return statuses
 
 def specify_draft_type():
     while True:
@@ -209,22 +527,37 @@ def get_raw_data(folder,num_teams,scoring_format,num_rounds):
         links.append(link)
 
     if len(links) != 0:
-        for link in links:
-            url_tups = get_draft_urls(link,num_teams,scoring_format,num_rounds)
-
-            for tup in url_tups:
-                link = tup[0]
-                filename = tup[1]
-                filename = filename.split('/')
-                filename = 'draft_' + filename[-1]
-
-                draft_picks = scrape_draft_picks(link)
-                save_to_csv(folder,filename,draft_picks)
+        session = create_session()
+        index = ScrapeIndex(folder.rstrip('/') + '_scrape_index.db')
+        url_tups = get_all_draft_urls(links,num_teams,scoring_format,num_rounds,session,index)
+        scrape_drafts(folder,url_tups,session,index)
+
+#Runs fn under the --profile/--trace-memory flags, then writes the metrics next to folder and prints them
+def run_instrumented(fn, folder, metrics):
+    metrics_path = folder.rstrip('/') + '_metrics'
+    result = run_with_profiling(fn, metrics, profile='--profile' in sys.argv, trace_memory='--trace-memory' in sys.argv,
+                                profile_path=metrics_path + '.prof')
+    metrics.finish_progress()
+    metrics.write(metrics_path + '.json')
+    metrics.print_summary()
+    return result
 
 def main():
 
     folder =  './dataset3_12_PPR_15'
     num_teams,scoring_format,num_rounds = specify_draft_type()
+    archive_path = folder.rstrip('/') + '_archive'
+
+    #python fp_html_scrape.py --replay rebuilds the folder from the archive instead of scraping.
+    #--archive keeps every fetched draft in the archive, with its full HTML unless --no-html is also given
+    #(--no-html alone archives the picks only). --profile and --trace-memory add cProfile and tracemalloc
+    #captures to <folder>_metrics.json
+    if '--replay' in sys.argv:
+        archive = DraftArchive(archive_path)
+        settings = get_ingest_settings(folder,scoring_format,num_teams,num_rounds)
+        metrics = PipelineMetrics('replay', total=len(archive))
+        report_ingestion(run_instrumented(lambda: replay_archive(archive, settings, '--reparse' in sys.argv, metrics), folder, metrics))
+        return
     # get_raw_data(folder,num_teams,scoring_format,num_rounds)
 
     links = ['https://draftwizard.fantasypros.com/football/mock-drafts-directory/',
@@ -270,24 +603,20 @@ def main():
     'https://draftwizard.fantasypros.com/football/mock-drafts-directory/?start=eQransVR-6g79qy5cs9PuMf2ZJe8PJnfhPKduRUd1tNHmuR8tWgoJIW-ebhnelV4',
     'https://draftwizard.fantasypros.com/football/mock-drafts-directory/?start=DsRbyOIeYYka8J3s7szaudD0RwmzeKnBAfFUPD7nsNGtZq0JCYe8gC2FImabRyqT']
     
-    for link in links:
-            url_tups = get_draft_urls(link,num_teams,scoring_format,num_rounds)
-
-            for tup in url_tups:
-                link = tup[0]
-                filename = tup[1]
-                filename = filename.split('/')
-                filename = 'draft_' + filename[-1]
-
-                draft_picks = scrape_draft_picks(link)
-                save_to_csv(folder,filename,draft_picks)
-
-
-    clean_data(folder,scoring_format)
-    add_headers(folder)
-    check_num_teams(folder,num_teams)
-    encode_team_names(folder)
-    check_pick_order(folder, num_teams, num_rounds)
+    session = create_session()
+    index = ScrapeIndex(folder.rstrip('/') + '_scrape_index.db')
+    metrics = PipelineMetrics('scrape')
+    archive = None
+    if '--archive' in sys.argv or '--no-html' in sys.argv:
+        archive = DraftArchive(archive_path, store_html='--no-html' not in sys.argv)
+
+    def run():
+        url_tups = get_all_draft_urls(links,num_teams,scoring_format,num_rounds,session,index,metrics)
+        settings = get_ingest_settings(folder,scoring_format,num_teams,num_rounds)
+        metrics.set_total(len(url_tups))
+        return scrape_drafts(folder,url_tups,session,index,settings,archive,metrics)
+
+    report_ingestion(run_instrumented(run, folder, metrics))
 
 
 
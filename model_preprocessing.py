@@ -1,6 +1,13 @@
 import os 
+import sys
+import time
+import bisect
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
+from draft_dataset import encode_positions, encode_teams, write_dataset
+from pipeline_metrics import PipelineMetrics, run_with_profiling
 
 #Representation 1: Accounts for players left on the board
 
@@ -36,27 +43,28 @@ def get_team_roster_repr(df, team_name, current_pick_num):
     team_df = df[df['team_name'] == team_name]
 
     positions = {'QB': 0, 'RB': 0, 'WR': 0, 'TE': 0, 'FLEX': 0, 'DST' : 0, 'K' : 0, 'Bench' : 0}
-    starting_lineup = []
-    bench = []
     team_df = team_df.sort_values('ADP')
 
-    for index,row in team_df.iterrows():
-            pos = row['player_pos']
-
-            if ((pos in ['RB', 'WR'] and positions[pos] < 2) or
-                (pos in ['QB', 'TE', 'DST', 'K'] and positions[pos] < 1)):
-                positions[pos] += 1
-            elif (pos == 'RB' and positions[pos] >= 2 and positions['FLEX'] < 1):
-                positions['FLEX'] += 1
-
-            elif (pos == 'WR' and positions[pos] >= 2 and positions['FLEX'] < 1):
-                positions['FLEX'] += 1
-            else:
-                positions['Bench'] += 1
+    for pos in team_df['player_pos']:
+        add_to_team_roster(positions, pos)
 
     curr_roster = [x for x in positions.values()]
     return np.array(curr_roster)
 
+#Fills the next open slot for a player at pos. Slot counts don't depend on the order players
+#are added in, so rosters can also be built up one pick at a time
+def add_to_team_roster(positions, pos):
+    if ((pos in ['RB', 'WR'] and positions[pos] < 2) or
+        (pos in ['QB', 'TE', 'DST', 'K'] and positions[pos] < 1)):
+        positions[pos] += 1
+    elif (pos == 'RB' and positions[pos] >= 2 and positions['FLEX'] < 1):
+        positions['FLEX'] += 1
+
+    elif (pos == 'WR' and positions[pos] >= 2 and positions['FLEX'] < 1):
+        positions['FLEX'] += 1
+    else:
+        positions['Bench'] += 1
+
 #Forms a single state representation based on the two representations 
 def get_state_representation(df, current_pick_num, team_name, max_players=180):
     team_roster_repr = get_team_roster_repr(df, team_name, current_pick_num)
@@ -64,107 +72,331 @@ def get_state_representation(df, current_pick_num, team_name, max_players=180):
     state_repr = np.concatenate([team_roster_repr, remaining_players_repr], axis=None)
     return state_repr
 
+#Vectorized featurizer: computes every state of a draft at once with array operations
+
+#Returns an (n_picks, 32) array where row i matches get_state_representation for the i-th pick
+#(in pick_num order) with team_order[i] on the clock. Defaults to the team that made each pick
+def featurize_draft(df, team_order=None):
+    df = df.sort_values('pick_num')
+    positions = ['QB', 'RB', 'WR', 'TE', 'DST', 'K']
+    n_picks = len(df)
+    adp = df['ADP'].to_numpy(dtype=float)
+    default_adp = adp.max() + 10
+
+    if team_order is None:
+        team_order = df['team_name'].to_numpy()
+    team_names, team_codes = np.unique(np.concatenate([df['team_name'].to_numpy(), np.asarray(team_order)]), return_inverse=True)
+    pick_team, clock_team = team_codes[:n_picks], team_codes[n_picks:]
+
+    #One-hot pick matrix: pos_picks[i, j] is True if pick i was a player at positions[j]
+    pos_picks = df['player_pos'].to_numpy()[:, None] == np.array(positions)
+
+    states = np.zeros((n_picks, 32))
+
+    #Representation 2: per-team position counts of everything picked before each pick. Last column counts all picks
+    team_picks = np.zeros((n_picks + 1, len(team_names), len(positions) + 1))
+    team_picks[np.arange(1, n_picks + 1), pick_team, :-1] = pos_picks
+    team_picks[np.arange(1, n_picks + 1), pick_team, -1] = 1
+    counts = np.cumsum(team_picks, axis=0)[np.arange(n_picks), clock_team]
+    qb, rb, wr, te, dst, k, total = counts.T
+
+    roster = np.column_stack([np.minimum(qb, 1), np.minimum(rb, 2), np.minimum(wr, 2), np.minimum(te, 1),
+                              np.minimum(np.maximum(rb - 2, 0) + np.maximum(wr - 2, 0), 1),
+                              np.minimum(dst, 1), np.minimum(k, 1)])
+    states[:, :7] = roster
+    states[:, 7] = total - roster.sum(axis=1)
+
+    #Representation 1: players still on the board at each pick, including the current one
+    remaining_counts = np.cumsum(pos_picks[::-1], axis=0)[::-1]
+
+    for j, pos in enumerate(positions):
+        pos_rows = np.flatnonzero(pos_picks[:, j])
+        by_adp = np.argsort(adp[pos_rows], kind='stable')
+
+        #alive[d, r] is True if the r-th best player by ADP is still available after d players at pos were drafted
+        alive = by_adp[None, :] >= np.arange(len(pos_rows) + 1)[:, None]
+        nth_alive = np.cumsum(alive, axis=1)
+        top_adp = np.full((len(pos_rows) + 1, 3), default_adp)
+        for n in range(3):
+            hit = alive & (nth_alive == n + 1)
+            found = hit.any(axis=1)
+            #Rows with nobody left (or no players at pos at all) keep default_adp
+            if found.any():
+                top_adp[found, n] = adp[pos_rows[by_adp[hit[found].argmax(axis=1)]]]
+
+        drafted = np.cumsum(pos_picks[:, j]) - pos_picks[:, j]
+        states[:, 8 + 4*j] = remaining_counts[:, j]
+        states[:, 9 + 4*j:12 + 4*j] = top_adp[drafted]
+
+    return states
+
+#Incremental state builder: walks a draft once instead of re-filtering it for every pick. Same output as
+#featurize_draft, one pick at a time in plain Python, so it's also the readable reference for it
+
+#Returns an array where row i matches get_state_representation(df, i+1, team_order[i])
+def get_draft_state_representations(df, team_order):
+    df = df.sort_values('pick_num')
+    default_adp = df['ADP'].max() + 10
+    positions = ['QB', 'RB', 'WR', 'TE', 'DST', 'K']
+
+    #Sorted ADP values of undrafted players at each position
+    remaining = {pos: sorted(df.loc[df['player_pos'] == pos, 'ADP'].tolist()) for pos in positions}
+    rosters = {}
+    picks = list(zip(df['pick_num'], df['team_name'], df['player_pos'], df['ADP']))
+
+    states = np.zeros((len(team_order), 32))
+    next_pick = 0
+    for i, team_name in enumerate(team_order):
+        current_pick_num = i + 1
+
+        #Move every pick made before the current one off the board and onto its team's roster
+        while next_pick < len(picks) and picks[next_pick][0] < current_pick_num:
+            _, team, pos, adp = picks[next_pick]
+            if pos in remaining:
+                pos_adp_values = remaining[pos]
+                del pos_adp_values[bisect.bisect_left(pos_adp_values, adp)]
+            if team not in rosters:
+                rosters[team] = {'QB': 0, 'RB': 0, 'WR': 0, 'TE': 0, 'FLEX': 0, 'DST' : 0, 'K' : 0, 'Bench' : 0}
+            add_to_team_roster(rosters[team], pos)
+            next_pick += 1
+
+        if team_name in rosters:
+            states[i, :8] = list(rosters[team_name].values())
+
+        for j, pos in enumerate(positions):
+            pos_adp_values = remaining[pos][:3]
+            # If less than 3 players, pad w/ default_adp (max + 10)
+            while len(pos_adp_values) < 3:
+                pos_adp_values.append(default_adp)
+            states[i, 8 + 4*j:12 + 4*j] = [len(remaining[pos])] + pos_adp_values
+
+    return states
+
+#Draft grading: scores every team of one or many drafts at once from a stacked picks table
+#(team_name, player_pos, ADP and, for several drafts, draft_id). Starters and the FLEX count 1.5x
+#their ADP, bench players 1x, so lower is better. K and DST are ignored
+
+#Returns one row per (draft_id, team_name) with its score and whether it's among the k best of its draft
+def grade_drafts(picks, k=4):
+    picks = picks[picks['player_pos'].isin(['QB', 'RB', 'WR', 'TE'])]
+    if 'draft_id' not in picks.columns:
+        picks = picks.assign(draft_id=0)
+    picks = picks.sort_values('ADP', kind='stable')
+
+    #Lineup slots by ADP rank within (team, position): 1 QB, 2 RB, 2 WR, 1 TE, then the best leftover RB/WR is the FLEX
+    pos_rank = picks.groupby(['draft_id', 'team_name', 'player_pos'], sort=False).cumcount().to_numpy()
+    pos = picks['player_pos'].to_numpy()
+    starter = np.where(np.isin(pos, ['RB', 'WR']), pos_rank < 2, pos_rank < 1)
+    flex_candidate = np.isin(pos, ['RB', 'WR']) & ~starter
+    flex = np.zeros(len(picks), dtype=bool)
+    flex[flex_candidate] = picks[flex_candidate].groupby(['draft_id', 'team_name'], sort=False).cumcount().to_numpy() == 0
+
+    weighted_adp = picks['ADP'].to_numpy() * np.where(starter | flex, 1.5, 1)
+    scores = (picks.assign(score=weighted_adp)
+                   .groupby(['draft_id', 'team_name'], sort=False)['score'].sum()
+                   .reset_index()
+                   .sort_values(['draft_id', 'score'], kind='stable'))
+    scores['best'] = scores.groupby('draft_id', sort=False).cumcount().to_numpy() < k
+    return scores.reset_index(drop=True)
+
+#Returns a boolean mask over the rows of picks marking picks made by one of the k best teams of their draft
+def get_best_team_mask(picks, k=4):
+    scores = grade_drafts(picks, k)
+    best = scores.loc[scores['best'], ['draft_id', 'team_name']]
+    keys = picks[['draft_id', 'team_name']] if 'draft_id' in picks.columns else picks[['team_name']].assign(draft_id=0)
+    return keys.merge(best.assign(is_best=True), on=['draft_id', 'team_name'], how='left')['is_best'].notna().to_numpy()
+
+#Names of the 4 best teams of a single draft, best first
 def get_best_teams(df):
-    df = df[df['player_pos'] != 'K']
-    df = df[df['player_pos'] != 'DST']
-
-    draft_scores = {}
-
-    for team in df['team_name'].unique().tolist():
-        starting_lineup = []
-        bench = []
-        team_df = df[df['team_name'] == f'{team}']
-        team_df = team_df.sort_values('ADP')
-        for index,row in team_df.iterrows():
-            pos = row['player_pos']
-            positions = {'QB': 0, 'RB': 0, 'WR': 0, 'TE': 0, 'FLEX': 0, 'Bench': 0}
-
-            if ((pos in ['RB', 'WR'] and positions[pos] < 2) or
-                (pos in ['QB', 'TE'] and positions[pos] < 1)):
-                positions[pos] += 1
-                starting_lineup.append(row['ADP'])
-
-            elif (pos == 'RB' and positions[pos] >= 2 and positions['FLEX'] < 1):
-                positions['FLEX'] += 1
-                starting_lineup.append(row['ADP'])
-
-            elif (pos == 'WR' and positions[pos] >= 2 and positions['FLEX'] < 1):
-                positions['FLEX'] += 1
-                starting_lineup.append(row['ADP'])
-
-            else:
-                positions['Bench'] += 1
-                bench.append(row['ADP'])
-        
-        team_draft_score = sum([i*1.5 for i in starting_lineup]) + sum(bench)
-        draft_scores[team] =  team_draft_score
-
-    draft_score_df = pd.DataFrame.from_dict(draft_scores, orient='index').reset_index()
-    draft_score_df.columns = ['team_name', 'score']
-    draft_score_df = draft_score_df.sort_values(by='score', ascending=True)
-
-    return list(draft_score_df[:4]['team_name'])
-
-def preprocess_data(data_folders):
-    inputs = []
-    outputs = []
-    inputs_best = []
-    outputs_best = []
-    best_teams = []
-    teams = []
+    scores = grade_drafts(df)
+    return list(scores.loc[scores['best'], 'team_name'])
 
+#Featurizes one draft file into compact arrays: states, next pick positions, team on the clock
+#and whether that team finished among the draft's best teams. Seconds spent reading, grading and
+#featurizing are stored in timings when it's given
+def featurize_draft_file(file_path, timings=None):
     expected_draft_order = (list(range(1, 13)) + list(range(12, 0, -1)))*15
     expected_draft_order = expected_draft_order[:int(len(expected_draft_order)/2)]
 
+    start = time.perf_counter()
+    df = pd.read_csv(file_path)
+    read_done = time.perf_counter()
+    best_teams = get_best_teams(df)
+    grade_done = time.perf_counter()
+
+    num_picks = df['pick_num'].max()
+    team_order = [f'Team{teamID}' for teamID in expected_draft_order[:num_picks]]
+    states = featurize_draft(df, team_order)
+    pick_positions = dict(zip(df['pick_num'], df['player_pos']))
+
+    # state at each pick is paired with the position of the player picked next
+    inputs = states[:num_picks - 1]
+    outputs = np.array([pick_positions[pick_num + 1] for pick_num in range(1, num_picks)])
+    teams = np.array(team_order[:num_picks - 1])
+    is_best = np.isin(teams, best_teams)
+
+    if timings is not None:
+        timings.update(read=read_done - start, grade=grade_done - read_done, featurize=time.perf_counter() - grade_done)
+    return inputs, outputs, teams, is_best
+
+#featurize_draft_file plus its stage timings, for process pool workers
+def featurize_draft_file_timed(file_path):
+    timings = {}
+    return featurize_draft_file(file_path, timings), timings
+
+#Lists draft files in a stable order so results don't depend on the file system or worker count
+def list_draft_files(data_folders):
+    file_paths = []
     for folder_path in data_folders:
-        for filename in os.listdir(folder_path):
+        for filename in sorted(os.listdir(folder_path)):
             if not os.path.isdir(os.path.join(folder_path, filename)):
-                file_path = os.path.join(folder_path, filename)
-                df = pd.read_csv(file_path)
-
-                best_teams = get_best_teams(df)
-                
-                for pick_num in range(1, df['pick_num'].max()):
-                    # generate the state representation for the current pick
-                    teamID = expected_draft_order[pick_num - 1]
-                    state_repr = get_state_representation(df, pick_num, f'Team{teamID}')  # replace team_name with actual team name
-                    # get the position of the player picked next
-                    next_pick_pos = df.loc[df['pick_num'] == pick_num+1, 'player_pos'].values[0]
-                    # store the input-output pair
-                    inputs.append(state_repr)
-                    outputs.append(next_pick_pos)
-                    teams.append(f'Team{teamID}')
-
-                    if f'Team{teamID}' in best_teams:
-                        inputs_best.append(state_repr)
-                        outputs_best.append(next_pick_pos)
-                        best_teams.append(f'Team{teamID}')
-
-    inputs = np.array(inputs)
-    outputs = np.array(outputs)
-    inputs_best = np.array(inputs_best)
-    outputs_best = np.array(outputs_best)
-    teams = np.array(teams)
-    best_teams = np.array(best_teams)
+                file_paths.append(os.path.join(folder_path, filename))
+    return file_paths
+
+#Bump whenever featurize_draft_file output changes so cached features get rebuilt
+FEATURIZER_VERSION = 2
+
+#Featurizes each file, fanning them out to a process pool when workers > 1. Results come back in file_paths order.
+#With metrics (a PipelineMetrics), per-stage and per-file timings and bytes read are recorded as files finish
+def featurize_draft_files(file_paths, workers=1, metrics=None):
+    if metrics is not None:
+        #Only the files featurized here are recorded as items, so cache hits don't count toward the total
+        metrics.set_total(len(file_paths))
+    if workers > 1 and len(file_paths) > 1:
+        chunksize = max(1, len(file_paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return collect_featurized_files(file_paths, executor.map(featurize_draft_file_timed, file_paths, chunksize=chunksize), metrics)
+    return collect_featurized_files(file_paths, map(featurize_draft_file_timed, file_paths), metrics)
+
+#Gathers (result, timings) pairs in file order as they arrive, recording each file when there are metrics
+def collect_featurized_files(file_paths, timed_results, metrics=None):
+    results = []
+    for file_path, (result, timings) in zip(file_paths, timed_results):
+        if metrics is not None:
+            record_featurized_file(metrics, file_path, timings)
+        results.append(result)
+    return results
+
+def record_featurized_file(metrics, file_path, timings):
+    for stage, seconds in timings.items():
+        metrics.add_stage_time(stage, seconds)
+    metrics.count('bytes_read', os.path.getsize(file_path))
+    metrics.record_item(file_path, sum(timings.values()))
+
+#Cache key for a draft file: hash of its contents and the featurizer version
+def get_feature_cache_key(file_path):
+    with open(file_path, 'rb') as file:
+        content = file.read()
+    return hashlib.sha1(f'{FEATURIZER_VERSION}:'.encode() + content).hexdigest()
+
+#Returns per-file features from cache_folder, featurizing only new or changed files. Cache entries
+#that no longer belong to any file in file_paths are evicted
+def featurize_draft_files_cached(file_paths, cache_folder, workers=1, metrics=None):
+    os.makedirs(cache_folder, exist_ok=True)
+    keys = [get_feature_cache_key(file_path) for file_path in file_paths]
+    cache_paths = [os.path.join(cache_folder, key + '.npz') for key in keys]
+
+    missing = [i for i, cache_path in enumerate(cache_paths) if not os.path.exists(cache_path)]
+    if metrics is not None:
+        metrics.count('cache_hits', len(file_paths) - len(missing))
+        metrics.count('cache_misses', len(missing))
+    new_results = featurize_draft_files([file_paths[i] for i in missing], workers, metrics)
+    for i, (inputs, outputs, teams, is_best) in zip(missing, new_results):
+        #Write then rename so an interrupted run never leaves a partial entry behind
+        tmp_path = cache_paths[i] + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            np.savez(file, inputs=inputs, outputs=outputs, teams=teams, is_best=is_best)
+        os.replace(tmp_path, cache_paths[i])
+        if metrics is not None:
+            metrics.count('bytes_written', os.path.getsize(cache_paths[i]))
+
+    live_entries = set(key + '.npz' for key in keys)
+    for filename in os.listdir(cache_folder):
+        if filename not in live_entries:
+            os.remove(os.path.join(cache_folder, filename))
+
+    results = []
+    for cache_path in cache_paths:
+        with np.load(cache_path) as entry:
+            results.append((entry['inputs'], entry['outputs'], entry['teams'], entry['is_best']))
+    return results
+
+def get_featurized_files(file_paths, workers=1, cache_folder=None, metrics=None):
+    if cache_folder is not None:
+        return featurize_draft_files_cached(file_paths, cache_folder, workers, metrics)
+    return featurize_draft_files(file_paths, workers, metrics)
+
+#workers > 1 fans draft files out to a process pool. Results are merged in list_draft_files order,
+#so the arrays are identical for any number of workers. With cache_folder set, only new or changed
+#drafts are featurized
+def preprocess_data(data_folders, workers=1, cache_folder=None, metrics=None):
+    file_paths = list_draft_files(data_folders)
+    results = get_featurized_files(file_paths, workers, cache_folder, metrics)
+
+    inputs = np.concatenate([result[0] for result in results])
+    outputs = np.concatenate([result[1] for result in results])
+    teams = np.concatenate([result[2] for result in results])
+    is_best = np.concatenate([result[3] for result in results])
+
+    inputs_best = inputs[is_best]
+    outputs_best = outputs[is_best]
+    best_teams = teams[is_best]
 
     return inputs,outputs,inputs_best,outputs_best,best_teams,teams
 
-def simulate_pick(df,current_pick_num,team_name):
-    next_pick_pos = df.loc[df['pick_num'] == current_pick_num+1, 'player_pos'].values[0]
-
-    input_vector = get_state_representation(df, current_pick_num, team_name, max_players)
-
-    input_vector = input_vector.reshape(1, 1, -1)
-
-    y_pred = model.predict(input_vector)
-
-    top_two_indices = np.argsort(y_pred[0])[-2:]
-
-    top_two_predictions = encoder.inverse_transform(top_two_indices)
-
-    top_two_probabilities = y_pred[0][top_two_indices]
-
-    for pred, prob in zip(top_two_predictions, top_two_probabilities):
+#Same draft features as preprocess_data, encoded for the draft_dataset store. Best-team rows are
+#a boolean mask instead of a second copy of the arrays
+def build_training_set(data_folders, workers=1, cache_folder=None, metrics=None):
+    file_paths = list_draft_files(data_folders)
+    results = get_featurized_files(file_paths, workers, cache_folder, metrics)
+
+    return {
+        'inputs': np.concatenate([result[0] for result in results]).astype(np.float32),
+        'outputs': encode_positions(np.concatenate([result[1] for result in results])),
+        'teams': encode_teams(np.concatenate([result[2] for result in results])),
+        'best': np.concatenate([result[3] for result in results]),
+        'drafts': np.repeat(np.arange(len(results), dtype=np.int32), [len(result[0]) for result in results]),
+    }
+
+#Streams fixed-size (X, y) training batches straight from the draft files, one draft in memory at a time.
+#X is float32 (batch_size, 32) and y holds int8 position codes (see draft_dataset.POSITIONS), ready for
+#Keras fit or scikit-learn partial_fit. The last batch is smaller unless drop_remainder is set
+def iter_training_batches(data_folders, batch_size, best_only=False, drop_remainder=False):
+    X = np.empty((batch_size, 32), dtype=np.float32)
+    y = np.empty(batch_size, dtype=np.int8)
+    filled = 0
+
+    for file_path in list_draft_files(data_folders):
+        inputs, outputs, teams, is_best = featurize_draft_file(file_path)
+        if best_only:
+            inputs, outputs = inputs[is_best], outputs[is_best]
+        outputs = encode_positions(outputs)
+
+        start = 0
+        while start < len(inputs):
+            take = min(batch_size - filled, len(inputs) - start)
+            X[filled:filled + take] = inputs[start:start + take]
+            y[filled:filled + take] = outputs[start:start + take]
+            filled += take
+            start += take
+
+            if filled == batch_size:
+                yield X, y
+                X = np.empty((batch_size, 32), dtype=np.float32)
+                y = np.empty(batch_size, dtype=np.int8)
+                filled = 0
+
+    if filled and not drop_remainder:
+        yield X[:filled], y[:filled]
+
+#Prints the two most likely positions for team_name's next pick. pick_model is a pick_model.PickModel
+#(or PickModelBatcher), e.g. get_pick_model('./batch2_12_PPR_15/model')
+def simulate_pick(df,current_pick_num,team_name,pick_model):
+    input_vector = get_state_representation(df, current_pick_num, team_name)
+
+    top_two_predictions, top_two_probabilities = pick_model.predict_top_k(input_vector, k=2)
+
+    for pred, prob in zip(top_two_predictions[0], top_two_probabilities[0]):
         print(f'Predicted label: {pred}, Probability: {prob}')
 
 def get_top_two_accuracy(model, X_test,y_test_encoded):
@@ -181,18 +413,27 @@ def get_top_two_accuracy(model, X_test,y_test_encoded):
 
     
 
+#Total size of the files under path
+def get_folder_size(path):
+    return sum(os.path.getsize(os.path.join(root, filename)) for root, _, filenames in os.walk(path) for filename in filenames)
+
+#python model_preprocessing.py [--profile] [--trace-memory] writes run metrics to <batch>/metrics.json
+#(and the cProfile output to <batch>/metrics.prof)
 def main():
     batch = './batch2_12_PPR_15/'
     data_folders = ['./dataset1_12_PPR_15','./dataset2_12_PPR_15', './dataset3_12_PPR_15']
-
-    inputs,outputs,inputs_best,outputs_best,best_teams,teams = preprocess_data(data_folders)
-    
-    np.save(batch + 'inputs', inputs)
-    np.save(batch + 'outputs', outputs)
-    np.save(batch + 'inputs_best', inputs_best)
-    np.save(batch + 'outputs_best', outputs_best)
-    np.save(batch + 'best_teams', best_teams)
-    np.save(batch + 'teams', teams)
+    metrics = PipelineMetrics('preprocess')
+
+    def run():
+        training_set = build_training_set(data_folders, workers=os.cpu_count(), cache_folder=batch + 'cache', metrics=metrics)
+        with metrics.stage('save'):
+            write_dataset(batch + 'dataset', **training_set)
+        metrics.count('bytes_written', get_folder_size(batch + 'dataset'))
+
+    run_with_profiling(run, metrics, profile='--profile' in sys.argv, trace_memory='--trace-memory' in sys.argv, profile_path=batch + 'metrics.prof')
+    metrics.finish_progress()
+    metrics.write(batch + 'metrics.json')
+    metrics.print_summary()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,180 @@
+import os
+import sys
+import json
+import pickle
+import queue
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+#Inference for the pick-position model: a saved model plus its label encoder's classes, loaded once and
+#queried with batches of 32 element draft states. Saved model layout:
+#
+#   <path>/pick_model.json   {"kind": "keras" | "sklearn", "classes": [...], "compiled": "model.npz"}
+#   <path>/model.keras       Keras model (LSTM models take states shaped (n, 1, 32))
+#   <path>/model.pkl         pickled scikit-learn classifier with predict_proba
+#   <path>/model.npz         optional NumPy-only copy of either (compiled_model.py), loaded instead when present
+
+MODEL_META = 'pick_model.json'
+DEFAULT_PORT = 8765
+
+class PickModel:
+    def __init__(self, model, classes, kind):
+        self.model = model
+        self.classes = np.asarray(classes)
+        self.kind = kind
+        #Keras recurrent models expect a time axis
+        self.sequence_input = kind == 'keras' and len(model.input_shape) == 3
+
+    #(n, 32) states -> (n, n_classes) probabilities in self.classes order
+    def predict_proba(self, states):
+        states = np.asarray(states, dtype=np.float32).reshape(-1, 32)
+        if not len(states):
+            return np.empty((0, len(self.classes)), dtype=np.float32)
+        if self.kind in ('sklearn', 'numpy'):
+            return self.model.predict_proba(states)
+        if self.sequence_input:
+            states = states[:, None, :]
+        #Calling the model directly skips predict()'s per-call setup, which dominates small batches
+        return np.asarray(self.model(states, training=False))
+
+    #Returns (positions, probabilities), both (n, k) with the most likely position first
+    def predict_top_k(self, states, k=2):
+        return get_top_k(self.predict_proba(states), self.classes, k)
+
+def get_top_k(probabilities, classes, k=2):
+    k = min(k, probabilities.shape[1])
+    top = np.argsort(probabilities, axis=1)[:, ::-1][:, :k]
+    return classes[top], np.take_along_axis(probabilities, top, axis=1)
+
+#Saves a trained Keras or scikit-learn model with its fitted LabelEncoder
+def save_pick_model(path, model, encoder):
+    os.makedirs(path, exist_ok=True)
+    if hasattr(model, 'predict_proba'):
+        kind = 'sklearn'
+        with open(os.path.join(path, 'model.pkl'), 'wb') as file:
+            pickle.dump(model, file)
+    else:
+        kind = 'keras'
+        model.save(os.path.join(path, 'model.keras'))
+    with open(os.path.join(path, MODEL_META), 'w') as file:
+        json.dump({'kind': kind, 'classes': [str(label) for label in encoder.classes_]}, file, indent=1)
+
+#Loads the compiled copy if there is one (and compiled is set), which needs neither scikit-learn nor Keras
+def load_pick_model(path, compiled=True):
+    with open(os.path.join(path, MODEL_META)) as file:
+        meta = json.load(file)
+    if compiled and meta.get('compiled') and os.path.exists(os.path.join(path, meta['compiled'])):
+        from compiled_model import load_compiled_model
+        return PickModel(load_compiled_model(os.path.join(path, meta['compiled'])), meta['classes'], 'numpy')
+    if meta['kind'] == 'sklearn':
+        with open(os.path.join(path, 'model.pkl'), 'rb') as file:
+            model = pickle.load(file)
+    else:
+        from keras.models import load_model #Only needed for Keras models, and slow to import
+        model = load_model(os.path.join(path, 'model.keras'))
+    return PickModel(model, meta['classes'], meta['kind'])
+
+loaded_models = {}
+loaded_models_lock = threading.Lock()
+
+#Loads each saved model once per process
+def get_pick_model(path):
+    path = os.path.abspath(path)
+    with loaded_models_lock:
+        if path not in loaded_models:
+            loaded_models[path] = load_pick_model(path)
+        return loaded_models[path]
+
+#Coalesces concurrent requests into micro-batches: callers from any thread submit states and get a Future,
+#a single worker thread waits up to max_wait seconds (or until max_batch rows) to gather more requests,
+#then runs one predict for all of them
+class PickModelBatcher:
+    def __init__(self, pick_model, max_batch=1024, max_wait=0.005):
+        self.pick_model = pick_model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.requests = queue.Queue()
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    #Returns a Future resolving to (n, n_classes) probabilities
+    def submit(self, states):
+        future = Future()
+        self.requests.put((np.asarray(states, dtype=np.float32).reshape(-1, 32), future))
+        return future
+
+    def predict_proba(self, states):
+        return self.submit(states).result()
+
+    def predict_top_k(self, states, k=2):
+        return get_top_k(self.predict_proba(states), self.pick_model.classes, k)
+
+    def get_batch(self):
+        batch = [self.requests.get()]
+        rows = len(batch[0][0])
+        while rows < self.max_batch:
+            try:
+                request = self.requests.get(timeout=self.max_wait)
+            except queue.Empty:
+                break
+            batch.append(request)
+            rows += len(request[0])
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.get_batch()
+            try:
+                probabilities = self.pick_model.predict_proba(np.concatenate([states for states, _ in batch]))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            start = 0
+            for states, future in batch:
+                future.set_result(probabilities[start:start + len(states)])
+                start += len(states)
+
+#POST /predict {"states": [[32 floats], ...], "k": 2} -> {"positions": [[...]], "probabilities": [[...]]}
+class PickModelHandler(BaseHTTPRequestHandler):
+    batcher = None
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self.send_error(404)
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            positions, probabilities = self.batcher.predict_top_k(request['states'], int(request.get('k', 2)))
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_error(400, str(e))
+            return
+        body = json.dumps({'positions': positions.tolist(), 'probabilities': probabilities.tolist()}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def create_server(model_path, host='127.0.0.1', port=DEFAULT_PORT):
+    handler = type('Handler', (PickModelHandler,), {'batcher': PickModelBatcher(get_pick_model(model_path))})
+    return ThreadingHTTPServer((host, port), handler)
+
+#Usage: python pick_model.py <saved model folder> [port]
+def main():
+    if len(sys.argv) < 2:
+        print('Usage: python pick_model.py <saved model folder> [port]')
+        return
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PORT
+    server = create_server(sys.argv[1], port=port)
+    print(f'Serving pick-position predictions on http://127.0.0.1:{port}/predict')
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
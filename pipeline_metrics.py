@@ -0,0 +1,143 @@
+import io
+import sys
+import json
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+import numpy as np
+
+#Run metrics for the preprocessing and scraping pipelines: per-stage timers, per-item (draft file) latencies
+#with a histogram and the slowest items, counters (bytes read/written, HTTP status codes, cache hits, ...)
+#and a live progress line. Safe to update from worker threads. Written out as JSON with write()
+
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+PROGRESS_INTERVAL = 0.5 #Seconds between progress line updates
+SLOWEST_ITEMS = 20
+
+class PipelineMetrics:
+    def __init__(self, name, total=None, progress=True):
+        self.name = name
+        self.total = total
+        self.progress = progress
+        self.lock = threading.Lock()
+        self.start_time = time.perf_counter()
+        self.last_progress = 0
+        self.stages = {} #stage -> list of seconds
+        self.counters = {}
+        self.items = [] #(item, seconds)
+        self.extra = {}
+
+    def set_total(self, total):
+        self.total = total
+
+    def add_stage_time(self, stage, seconds):
+        with self.lock:
+            self.stages.setdefault(stage, []).append(seconds)
+
+    @contextmanager
+    def stage(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage_time(stage, time.perf_counter() - start)
+
+    def count(self, counter, n=1):
+        with self.lock:
+            self.counters[counter] = self.counters.get(counter, 0) + n
+
+    #Records one finished item (e.g. a draft file) and how long it took end to end
+    def record_item(self, item, seconds):
+        with self.lock:
+            self.items.append((str(item), seconds))
+        self.print_progress()
+
+    def print_progress(self, force=False):
+        now = time.perf_counter()
+        if not self.progress or (not force and now - self.last_progress < PROGRESS_INTERVAL):
+            return
+        self.last_progress = now
+        done = len(self.items)
+        elapsed = now - self.start_time
+        rate = done / elapsed if elapsed > 0 else 0
+        line = f'\r[{self.name}] {done}' + (f'/{self.total}' if self.total else '') + f' items  {rate:.1f}/s  {elapsed:.0f}s elapsed'
+        if self.total and rate > 0:
+            line += f'  ~{(self.total - done) / rate:.0f}s left'
+        sys.stderr.write(line + '   ')
+        sys.stderr.flush()
+
+    def finish_progress(self):
+        if self.progress:
+            self.print_progress(force=True)
+            sys.stderr.write('\n')
+
+    def summary(self):
+        with self.lock:
+            stages = {stage: dict(calls=len(times), **get_latency_summary(times)) for stage, times in self.stages.items()}
+            item_seconds = [seconds for _, seconds in self.items]
+            slowest = sorted(self.items, key=lambda item: item[1], reverse=True)[:SLOWEST_ITEMS]
+            summary = {'name': self.name, 'elapsed_seconds': time.perf_counter() - self.start_time, 'stages': stages,
+                       'counters': dict(self.counters),
+                       'items': dict(count=len(self.items), **get_latency_summary(item_seconds),
+                                     histogram_ms=get_latency_histogram(item_seconds),
+                                     slowest=[{'item': item, 'seconds': seconds} for item, seconds in slowest])}
+            summary.update(self.extra)
+        return summary
+
+    def write(self, path):
+        with open(path, 'w') as file:
+            json.dump(self.summary(), file, indent=1)
+
+    #One line per stage, slowest total first
+    def print_summary(self):
+        summary = self.summary()
+        print(f"{self.name}: {summary['items']['count']} items in {summary['elapsed_seconds']:.1f}s")
+        for stage, stats in sorted(summary['stages'].items(), key=lambda stage: stage[1]['total_seconds'], reverse=True):
+            print(f"  {stage:<12} {stats['total_seconds']:9.2f}s total  {stats['calls']:7d} calls  p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms")
+        for counter, value in sorted(summary['counters'].items()):
+            print(f'  {counter:<12} {value}')
+
+#metrics.stage(stage), or a no-op when metrics is None
+def measure_stage(metrics, stage):
+    return metrics.stage(stage) if metrics is not None else nullcontext()
+
+def get_latency_summary(seconds):
+    if not seconds:
+        return {'total_seconds': 0, 'mean_ms': 0, 'p50_ms': 0, 'p95_ms': 0, 'max_ms': 0}
+    ms = np.array(seconds) * 1000
+    return {'total_seconds': float(ms.sum() / 1000), 'mean_ms': float(ms.mean()), 'p50_ms': float(np.percentile(ms, 50)),
+            'p95_ms': float(np.percentile(ms, 95)), 'max_ms': float(ms.max())}
+
+#{'<=1': n, '<=2': n, ..., '>10000': n} counts of latencies in milliseconds
+def get_latency_histogram(seconds):
+    counts = np.bincount(np.searchsorted(LATENCY_BUCKETS_MS, np.array(seconds) * 1000), minlength=len(LATENCY_BUCKETS_MS) + 1)
+    labels = [f'<={bucket}' for bucket in LATENCY_BUCKETS_MS] + [f'>{LATENCY_BUCKETS_MS[-1]}']
+    return dict(zip(labels, counts.tolist()))
+
+#Runs fn() and adds optional captures to metrics: cProfile's top functions by cumulative time (the full
+#profile is saved to profile_path) and tracemalloc's peak and top allocation sites. cProfile only sees
+#the calling thread, so worker threads and processes show up as time spent waiting on them
+def run_with_profiling(fn, metrics, profile=False, trace_memory=False, profile_path=None):
+    profiler = cProfile.Profile() if profile else None
+    if trace_memory:
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        return fn()
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            if profile_path is not None:
+                profiler.dump_stats(profile_path)
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(25)
+            metrics.extra['profile'] = output.getvalue().splitlines()
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            metrics.extra['memory'] = {'peak_mb': tracemalloc.get_traced_memory()[1] / 2**20,
+                                       'top_allocations': [str(stat) for stat in snapshot.statistics('lineno')[:10]]}
+            tracemalloc.stop()
@@ -0,0 +1,59 @@
+import os
+import sys
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from compiled_model import compile_pick_model
+from model_preprocessing import featurize_draft
+from pick_model import load_pick_model, save_pick_model
+from test_featurize_draft import make_draft
+
+#The compiled NumPy copy of a model has to give the original's probabilities to within 1e-5
+
+TOLERANCE = 1e-5
+
+#States of a few synthetic drafts paired with the position picked next, and some nearby unseen states
+def get_training_data(num_drafts=6):
+    states, positions = [], []
+    for seed in range(num_drafts):
+        df = make_draft(seed=seed).sort_values('pick_num')
+        states.append(featurize_draft(df)[:-1])
+        positions.append(df['player_pos'].to_numpy()[1:])
+    states = np.concatenate(states).astype(np.float32)
+    check_states = np.concatenate([states, states + np.random.default_rng(0).normal(0, 2, states.shape).astype(np.float32)])
+    return states, np.concatenate(positions), check_states
+
+def assert_compiled_matches(path, check_states):
+    compile_pick_model(path, check_states)
+    compiled = load_pick_model(path)
+    original = load_pick_model(path, compiled=False)
+    assert compiled.kind == 'numpy' and original.kind != 'numpy'
+    np.testing.assert_allclose(compiled.predict_proba(check_states), original.predict_proba(check_states), rtol=0, atol=TOLERANCE)
+    np.testing.assert_array_equal(compiled.predict_top_k(check_states)[0], original.predict_top_k(check_states)[0])
+
+@pytest.mark.parametrize('model_name', ['RandomForestClassifier', 'ExtraTreesClassifier'])
+def test_compiled_forest(tmp_path, model_name):
+    ensemble = pytest.importorskip('sklearn.ensemble')
+    from sklearn.preprocessing import LabelEncoder
+    states, positions, check_states = get_training_data()
+    encoder = LabelEncoder()
+    model = getattr(ensemble, model_name)(n_estimators=20, class_weight={0: 2}, random_state=0).fit(states, encoder.fit_transform(positions))
+    save_pick_model(str(tmp_path), model, encoder)
+    assert_compiled_matches(str(tmp_path), check_states)
+
+@pytest.mark.parametrize('sequence_input', [False, True])
+def test_compiled_network(tmp_path, sequence_input):
+    keras = pytest.importorskip('keras')
+    states, positions, check_states = get_training_data(num_drafts=2)
+    classes, labels = np.unique(positions, return_inverse=True)
+    layers = ([keras.Input((1, 32)), keras.layers.LSTM(8), keras.layers.Dropout(0.2)] if sequence_input
+              else [keras.Input((32,)), keras.layers.Dense(16, activation='relu')])
+    model = keras.Sequential(layers + [keras.layers.Dense(len(classes), activation='softmax')])
+    model.compile(loss='sparse_categorical_crossentropy', optimizer='adam')
+    model.fit(states[:, None, :] / 100 if sequence_input else states / 100, labels, epochs=1, verbose=0)
+    save_pick_model(str(tmp_path), model, SimpleNamespace(classes_=classes))
+    assert_compiled_matches(str(tmp_path), check_states / 100)
@@ -0,0 +1,43 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from draft_log import SNAPSHOT_INTERVAL, DraftLog, apply_event, get_empty_state
+
+def replay_all_events(log, draft_id):
+    state = get_empty_state()
+    for event_type, data in log.get_events(draft_id):
+        apply_event(state, event_type, data)
+    return state
+
+#Snapshots taken while other threads keep appending to the same draft must only hold the events up to their own seq
+def test_snapshots_under_concurrent_appends(tmp_path):
+    log = DraftLog(str(tmp_path / 'drafts.db'))
+    draft_id = log.create_draft()
+    log.append(draft_id, 'settings', {'num_teams': 12})
+
+    def make_picks(thread):
+        for i in range(SNAPSHOT_INTERVAL):
+            log.append(draft_id, 'pick', {'player': f'Player {thread}-{i}', 'team': thread})
+            if i % 7 == 6:
+                log.append(draft_id, 'undo')
+
+    threads = [threading.Thread(target=make_picks, args=(thread,)) for thread in range(1, 5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert log.get_latest_snapshot(draft_id)[0] > 0
+    assert log.replay(draft_id) == replay_all_events(log, draft_id)
+
+def test_replay_after_snapshot(tmp_path):
+    log = DraftLog(str(tmp_path / 'drafts.db'))
+    draft_id = log.create_draft()
+    for i in range(2 * SNAPSHOT_INTERVAL + 3):
+        log.append(draft_id, 'pick', {'player': f'Player {i}', 'team': i % 12 + 1})
+    log.append(draft_id, 'undo')
+    assert log.get_latest_snapshot(draft_id)[0] == 2 * SNAPSHOT_INTERVAL
+    assert log.replay(draft_id)['picks'] == [[f'Player {i}', i % 12 + 1] for i in range(2 * SNAPSHOT_INTERVAL + 2)]
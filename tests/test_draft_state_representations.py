@@ -0,0 +1,30 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from model_preprocessing import featurize_draft, get_draft_state_representations
+from test_featurize_draft import POSITIONS, make_draft, get_expected_states
+
+#The single-pass builder has to match get_state_representation (and so featurize_draft) pick for pick
+
+@pytest.mark.parametrize('seed', range(10))
+def test_matches_state_representation(seed):
+    df = make_draft(seed=seed)
+    team_order = df.sort_values('pick_num')['team_name'].to_numpy()
+    states = get_draft_state_representations(df, team_order)
+    np.testing.assert_array_equal(states, get_expected_states(df, team_order))
+    np.testing.assert_array_equal(states, featurize_draft(df, team_order))
+
+def test_other_teams_and_missing_positions():
+    df = make_draft(num_teams=8, num_rounds=6, seed=21)
+    df = df[df['player_pos'] != 'K'].sort_values('pick_num')
+    df = df.assign(pick_num=np.arange(1, len(df) + 1), ADP=np.round(df['ADP'] / 4))
+    team_order = np.random.default_rng(21).choice([f'Team{team}' for team in range(1, 10)], len(df))
+    team_order[:5] = 'Team9'
+    states = get_draft_state_representations(df, team_order)
+    np.testing.assert_array_equal(states, get_expected_states(df, team_order))
+    assert (states[:, 8 + 4 * POSITIONS.index('K')] == 0).all()
@@ -0,0 +1,62 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_preprocessing import featurize_draft, get_state_representation
+
+#featurize_draft has to match get_state_representation pick for pick, since the training set was built with the latter
+
+POSITIONS = ['QB', 'RB', 'WR', 'TE', 'DST', 'K']
+
+#Snake draft with shuffled rows and ADPs rounded to whole numbers, so many players tie
+def make_draft(num_teams=10, num_rounds=12, seed=0):
+    rng = np.random.default_rng(seed)
+    teams = []
+    for round_num in range(num_rounds):
+        order = [f'Team{team}' for team in range(1, num_teams + 1)]
+        teams.extend(order if round_num % 2 == 0 else order[::-1])
+    num_picks = len(teams)
+    df = pd.DataFrame({'pick_num': np.arange(1, num_picks + 1), 'team_name': teams,
+                       'player': [f'Player {i}' for i in range(num_picks)],
+                       'player_pos': rng.choice(POSITIONS, num_picks, p=[0.12, 0.3, 0.34, 0.1, 0.07, 0.07]),
+                       'ADP': np.round(rng.uniform(1, num_picks / 4, num_picks))})
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+def get_expected_states(df, team_order):
+    return np.array([get_state_representation(df, pick_num, team_order[pick_num - 1]) for pick_num in range(1, len(df) + 1)])
+
+@pytest.mark.parametrize('seed', range(10))
+def test_matches_state_representation(seed):
+    df = make_draft(seed=seed)
+    team_order = df.sort_values('pick_num')['team_name'].to_numpy()
+    np.testing.assert_array_equal(featurize_draft(df, team_order), get_expected_states(df, team_order))
+    np.testing.assert_array_equal(featurize_draft(df), get_expected_states(df, team_order))
+
+#Teams on the clock that don't match the picking team, including one that never picks
+def test_other_teams_on_the_clock():
+    df = make_draft(num_teams=8, num_rounds=6, seed=11)
+    rng = np.random.default_rng(11)
+    team_order = rng.choice([f'Team{team}' for team in range(1, 10)], len(df))
+    team_order[:5] = 'Team9'
+    np.testing.assert_array_equal(featurize_draft(df, team_order), get_expected_states(df, team_order))
+
+def test_ties_in_adp():
+    df = make_draft(num_teams=6, num_rounds=8, seed=12).assign(ADP=3.0)
+    team_order = df.sort_values('pick_num')['team_name'].to_numpy()
+    np.testing.assert_array_equal(featurize_draft(df, team_order), get_expected_states(df, team_order))
+
+#Drafts where nobody takes a K (the position is missing entirely) or only two TEs go (fewer than 3 to pad)
+def test_missing_and_scarce_positions():
+    df = make_draft(seed=13)
+    df = df[df['player_pos'] != 'K']
+    te_rows = df.index[df['player_pos'] == 'TE']
+    df = df.drop(te_rows[2:]).sort_values('pick_num')
+    df = df.assign(pick_num=np.arange(1, len(df) + 1)).sample(frac=1, random_state=13)
+    team_order = df.sort_values('pick_num')['team_name'].to_numpy()
+    states = featurize_draft(df, team_order)
+    np.testing.assert_array_equal(states, get_expected_states(df, team_order))
+    assert (states[:, 8 + 4 * POSITIONS.index('K')] == 0).all()
@@ -0,0 +1,104 @@
+import os
+import sys
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fp_html_scrape
+from fp_html_scrape import ScrapeIndex, create_session, fetch_concurrently, fetch_page, get_all_draft_urls, scrape_drafts
+
+#Fetching against a local stub server that serves the saved FantasyPros fixtures
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+
+def load_fixture(filename):
+    with open(os.path.join(FIXTURES, filename), 'rb') as file:
+        return file.read()
+
+class StubHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+    flaky_failures = 0
+
+    def do_GET(self):
+        StubHandler.requests_seen.append(self.path)
+        if self.path.startswith('/football/mock-drafts-directory/'):
+            self.send_body(load_fixture('mock_drafts_directory.html'))
+        elif self.path == '/football/mock-draft/missing':
+            self.send_error(404)
+        elif self.path.startswith('/football/mock-draft/'):
+            self.send_body(load_fixture('mock_draft.html'))
+        elif self.path == '/flaky':
+            if StubHandler.flaky_failures < 1:
+                StubHandler.flaky_failures += 1
+                self.send_error(503)
+            else:
+                self.send_body(b'ok')
+        elif self.path == '/slow':
+            time.sleep(1)
+            self.send_body(b'too late')
+        elif self.path == '/error-page':
+            self.send_body(b'<html><body><p>Something went wrong</p></body></html>')
+        else:
+            self.send_error(404)
+
+    def send_body(self, body):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def server():
+    StubHandler.requests_seen = []
+    StubHandler.flaky_failures = 0
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture
+def session():
+    return create_session(backoff_factor=0)
+
+def test_directory_and_draft_fetches(server, session, tmp_path):
+    url_tups = get_all_draft_urls([server + '/football/mock-drafts-directory/'], 12, 'PPR', 15, session)
+    assert len(url_tups) == 8
+    assert all(link.startswith(server + '/football/mock-draft/') for link, _ in url_tups)
+
+    statuses = scrape_drafts(str(tmp_path), url_tups, session)
+    assert set(statuses.values()) == {'done'}
+    assert sorted(os.listdir(tmp_path)) == sorted(statuses)
+
+def test_retries_503_then_succeeds(server, session):
+    assert fetch_page(server + '/flaky', session) == 'ok'
+    assert StubHandler.requests_seen.count('/flaky') == 2
+
+def test_timeout(server, session, monkeypatch):
+    monkeypatch.setattr(fp_html_scrape, 'REQUEST_TIMEOUT', 0.2)
+    with pytest.raises(requests.RequestException):
+        fetch_page(server + '/slow', create_session(retries=0))
+    assert fetch_concurrently(lambda url: fetch_page(url, create_session(retries=0)), [server + '/slow']) == [None]
+
+def test_missing_draft_is_recorded_failed(server, session, tmp_path):
+    index = ScrapeIndex(str(tmp_path / 'index.db'))
+    url_tups = [(server + '/football/mock-draft/missing', '/football/mock-draft/missing'),
+                (server + '/football/mock-draft/abc', '/football/mock-draft/abc')]
+    index.add_page(server + '/football/mock-drafts-directory/?start=x', url_tups)
+    statuses = scrape_drafts(str(tmp_path / 'drafts'), url_tups, session, index)
+    assert statuses == {'draft_missing': 'failed', 'draft_abc': 'done'}
+    assert index.get_pending_drafts() == [url_tups[0]]
+
+#A page without the directory table fails on its own instead of stopping the other pages
+def test_unparseable_page_does_not_stop_the_run(server, session):
+    links = [server + '/error-page', server + '/football/mock-drafts-directory/']
+    assert len(get_all_draft_urls(links, 12, 'PPR', 15, session)) == 8
@@ -0,0 +1,77 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_preprocessing import get_best_team_mask, get_best_teams, grade_drafts
+
+#grade_drafts has to score teams the way the original per-team loop meant to, with the slot counts
+#kept across a team's players (the loop reset them on every row, so every RB/WR counted as a starter)
+
+POSITIONS = ['QB', 'RB', 'WR', 'TE', 'DST', 'K']
+
+def make_picks(num_drafts=20, num_teams=12, num_rounds=15, seed=0):
+    rng = np.random.default_rng(seed)
+    drafts = []
+    for draft_id in range(num_drafts):
+        num_picks = num_teams * num_rounds
+        drafts.append(pd.DataFrame({'draft_id': draft_id, 'pick_num': np.arange(1, num_picks + 1),
+                                    'team_name': [f'Team{team}' for team in rng.permutation(np.repeat(np.arange(1, num_teams + 1), num_rounds))],
+                                    'player_pos': rng.choice(POSITIONS, num_picks, p=[0.12, 0.3, 0.34, 0.1, 0.07, 0.07]),
+                                    'ADP': rng.uniform(1, 300, num_picks)}))
+    return pd.concat(drafts, ignore_index=True)
+
+#The original get_best_teams loop with positions initialized once per team
+def get_reference_scores(df):
+    df = df[~df['player_pos'].isin(['K', 'DST'])]
+    scores = {}
+    for team in df['team_name'].unique():
+        positions = {'QB': 0, 'RB': 0, 'WR': 0, 'TE': 0, 'FLEX': 0, 'Bench': 0}
+        starting_lineup, bench = [], []
+        for _, row in df[df['team_name'] == team].sort_values('ADP').iterrows():
+            pos = row['player_pos']
+            if (pos in ['RB', 'WR'] and positions[pos] < 2) or (pos in ['QB', 'TE'] and positions[pos] < 1):
+                positions[pos] += 1
+                starting_lineup.append(row['ADP'])
+            elif pos in ['RB', 'WR'] and positions['FLEX'] < 1:
+                positions['FLEX'] += 1
+                starting_lineup.append(row['ADP'])
+            else:
+                positions['Bench'] += 1
+                bench.append(row['ADP'])
+        scores[team] = sum(adp * 1.5 for adp in starting_lineup) + sum(bench)
+    return scores
+
+def test_matches_reference_loop():
+    picks = make_picks()
+    scores = grade_drafts(picks)
+    for draft_id, draft in picks.groupby('draft_id'):
+        reference = get_reference_scores(draft)
+        draft_scores = scores[scores['draft_id'] == draft_id]
+        assert dict(zip(draft_scores['team_name'], draft_scores['score'])) == pytest.approx(reference)
+        assert get_best_teams(draft) == sorted(reference, key=reference.get)[:4]
+
+#One RB and one WR beyond the starters: only the better of them takes FLEX. K and DST don't count
+def test_flex_and_excluded_positions():
+    team = pd.DataFrame({'team_name': 'Team1',
+                         'player_pos': ['QB', 'RB', 'RB', 'RB', 'WR', 'WR', 'WR', 'TE', 'QB', 'K', 'DST'],
+                         'ADP': [30, 1, 5, 40, 2, 6, 35, 20, 90, 150, 140]})
+    starters = [30, 1, 5, 2, 6, 20, 35] #QB, RB x2, WR x2, TE, FLEX (the WR at 35 beats the RB at 40)
+    bench = [40, 90]
+    score = grade_drafts(team)['score'].iloc[0]
+    assert score == pytest.approx(1.5 * sum(starters) + sum(bench))
+    assert score == pytest.approx(get_reference_scores(team)['Team1'])
+
+def test_best_team_mask_over_drafts():
+    picks = make_picks(num_drafts=5, seed=1)
+    mask = get_best_team_mask(picks)
+    expected = np.zeros(len(picks), dtype=bool)
+    for draft_id, draft in picks.groupby('draft_id'):
+        reference = get_reference_scores(draft)
+        best = sorted(reference, key=reference.get)[:4]
+        expected[draft.index] = draft['team_name'].isin(best).to_numpy()
+    np.testing.assert_array_equal(mask, expected)
+    assert mask.sum() == 5 * 4 * 15
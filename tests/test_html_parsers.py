@@ -0,0 +1,53 @@
+import os
+import sys
+import pytest
+from bs4 import BeautifulSoup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from fp_html_scrape import parse_draft_picks, parse_draft_urls
+from bench_html_parsing import DIRECTORY_URL, get_available_parsers, load_fixture
+
+#Every parser backend has to extract exactly what the bs4 backend does, and what the original
+#per-cell BeautifulSoup scraping extracted
+
+SETTINGS = [(12, 'PPR', 15), (10, 'PPR', 15), (12, 'Half', 16)]
+
+#The original get_draft_urls and scrape_draft_picks, minus the requests
+def get_baseline_draft_urls(html, num_teams, scoring_format, num_rounds):
+    url_tups = []
+    soup = BeautifulSoup(html, 'html.parser')
+    for row in soup.find('table', {'id': 'draftListTable'}).find('tbody').find_all('tr'):
+        teams = row.find_all('td')[3].text
+        scoring = row.find_all('td')[1].text
+        roster_settings = row.find_all('td')[2].text
+        rounds = row.find_all('td')[4].text
+        if str(num_teams) in teams and (str(scoring_format) in scoring and 'Half' not in scoring) and 'Default' in roster_settings and str(num_rounds) in rounds:
+            url_tups.append(("https://draftwizard.fantasypros.com" + row.find_all('td')[6].find('a')['href'], row.find_all('td')[6].find('a')['href']))
+    return url_tups
+
+def get_baseline_draft_picks(html):
+    draft_picks = []
+    for picked_player in BeautifulSoup(html, 'html.parser').find_all('div', {'class': 'PickedPlayer'}):
+        rank_div = picked_player.find('div', {'class': 'Rank'})
+        if rank_div is not None:
+            draft_picks.append({'title': picked_player.get('title', ''), 'rank': rank_div.text.strip()})
+    return draft_picks
+
+@pytest.mark.parametrize('parser', get_available_parsers())
+@pytest.mark.parametrize('settings', SETTINGS)
+def test_parse_draft_urls(parser, settings):
+    html = load_fixture('mock_drafts_directory.html')
+    url_tups = parse_draft_urls(html, DIRECTORY_URL, *settings, parser)
+    assert url_tups == parse_draft_urls(html, DIRECTORY_URL, *settings, 'bs4')
+    assert url_tups == get_baseline_draft_urls(html, *settings)
+
+@pytest.mark.parametrize('parser', get_available_parsers())
+def test_parse_draft_picks(parser):
+    html = load_fixture('mock_draft.html')
+    draft_picks = parse_draft_picks(html, parser)
+    assert len(draft_picks) == 180
+    assert draft_picks == parse_draft_picks(html, 'bs4')
+    assert draft_picks == get_baseline_draft_picks(html)
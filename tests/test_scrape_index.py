@@ -0,0 +1,35 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fp_html_scrape
+from fp_html_scrape import ScrapeIndex, get_all_draft_urls
+
+DIRECTORY_URL = 'https://draftwizard.fantasypros.com/football/mock-drafts-directory/'
+CURSOR_URL = DIRECTORY_URL + '?start=abc'
+
+def make_draft(draft_id):
+    return (f'https://draftwizard.fantasypros.com/nfl/mock-draft/{draft_id}', f'/nfl/mock-draft/{draft_id}')
+
+#A second run has to re-fetch the directory page without a cursor, which lists the newest drafts, but not
+#cursor pages it already went through
+def test_new_drafts_found_on_later_runs(tmp_path, monkeypatch):
+    listings = {DIRECTORY_URL: [make_draft('new1')], CURSOR_URL: [make_draft('old1'), make_draft('old2')]}
+    fetched = []
+    def get_draft_urls(link, *args):
+        fetched.append(link)
+        return listings[link]
+    monkeypatch.setattr(fp_html_scrape, 'get_draft_urls', get_draft_urls)
+    index = ScrapeIndex(str(tmp_path / 'index.db'))
+
+    first_run = get_all_draft_urls([DIRECTORY_URL, CURSOR_URL], 12, 'PPR', 15, index=index)
+    assert sorted(first_run) == sorted([make_draft('new1'), make_draft('old1'), make_draft('old2')])
+    for link, href in first_run:
+        index.set_draft_status(fp_html_scrape.get_draft_id(href), 'done')
+
+    listings[DIRECTORY_URL] = [make_draft('new2'), make_draft('new1')]
+    fetched.clear()
+    second_run = get_all_draft_urls([DIRECTORY_URL, CURSOR_URL], 12, 'PPR', 15, index=index)
+    assert fetched == [DIRECTORY_URL]
+    assert second_run == [make_draft('new2')]
@@ -0,0 +1,156 @@
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from draft_dataset import POSITIONS, load_dataset, read_dataset_meta, write_dataset
+
+#Cross-validation sweep over models, class weights and draft slot subsets for the pick-position model.
+#Folds are split by draft, so picks from one draft never end up on both sides of a split. Every (model,
+#class weights, slots, fold) job runs in its own worker process. Workers open the dataset store and the
+#cached fold assignment as memory maps by path, so the arrays are shared through the page cache instead
+#of being pickled to each worker. Results go to a leaderboard CSV with top-1, top-2 and per-class accuracy.
+#Usage: python train_sweep.py --models random_forest,extra_trees --class-weights none,qb4_te5 --slots all,1
+
+DEFAULT_DATASET = 'batch2_12_PPR_15/dataset'
+MODELS = ['random_forest', 'extra_trees', 'logistic']
+#Position -> weight, as in the notebook's hand-tuned RandomForest
+CLASS_WEIGHT_PRESETS = {'none': None, 'balanced': 'balanced', 'qb4_te5': {'QB': 4, 'TE': 5}}
+
+#scikit-learn is only needed by the workers that fit models
+def create_model(name, class_weight, seed):
+    if isinstance(class_weight, dict):
+        class_weight = {POSITIONS.index(pos): weight for pos, weight in class_weight.items()}
+    if name == 'random_forest':
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(n_estimators=100, class_weight=class_weight, random_state=seed, n_jobs=1)
+    if name == 'extra_trees':
+        from sklearn.ensemble import ExtraTreesClassifier
+        return ExtraTreesClassifier(n_estimators=100, class_weight=class_weight, random_state=seed, n_jobs=1)
+    if name == 'logistic':
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import StandardScaler
+        return make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000, class_weight=class_weight, random_state=seed))
+    raise ValueError(f'Unknown model {name}, expected one of {MODELS}')
+
+#Returns a store path whose arrays load as memory maps: the store itself if it's a single chunk,
+#otherwise a consolidated copy in cache_folder
+def get_mmap_dataset(dataset_path, cache_folder):
+    if len(read_dataset_meta(dataset_path)['chunks']) <= 1:
+        return dataset_path
+    consolidated_path = os.path.join(cache_folder, 'dataset')
+    consolidated_meta = os.path.join(consolidated_path, 'meta.json')
+    if not os.path.exists(consolidated_meta) or os.path.getmtime(consolidated_meta) < os.path.getmtime(os.path.join(dataset_path, 'meta.json')):
+        write_dataset(consolidated_path, **load_dataset(dataset_path))
+    return consolidated_path
+
+#Assigns each draft to one of num_folds folds at random (seeded) and caches the per-row fold ids as an .npy file
+def get_fold_path(dataset_path, cache_folder, num_folds, seed):
+    drafts = load_dataset(dataset_path)['drafts']
+    fold_path = os.path.join(cache_folder, f'folds_{num_folds}_{seed}_{len(drafts)}.npy')
+    if not os.path.exists(fold_path):
+        draft_ids = np.unique(drafts)
+        draft_folds = np.random.default_rng(seed).permutation(len(draft_ids)) % num_folds
+        tmp_path = fold_path + '.tmp.npy'
+        np.save(tmp_path, draft_folds[np.searchsorted(draft_ids, drafts)].astype(np.int8))
+        os.replace(tmp_path, fold_path)
+    return fold_path
+
+#Rows of a slot subset: 'all', or draft slots joined with '+' like '1' or '1+12'
+def get_slot_rows(teams, slots):
+    if slots == 'all':
+        return np.arange(len(teams))
+    return np.flatnonzero(np.isin(teams, [int(slot) for slot in slots.split('+')]))
+
+#Fits one model on every fold but one and scores it on the held out fold. Returns counts so folds can be pooled
+def run_fold(dataset_path, fold_path, model_name, class_weight_name, slots, fold, seed):
+    start = time.perf_counter()
+    dataset = load_dataset(dataset_path)
+    folds = np.load(fold_path, mmap_mode='r')
+
+    rows = get_slot_rows(dataset['teams'], slots)
+    train_rows = rows[folds[rows] != fold]
+    test_rows = rows[folds[rows] == fold]
+
+    model = create_model(model_name, CLASS_WEIGHT_PRESETS[class_weight_name], seed)
+    model.fit(dataset['inputs'][train_rows], dataset['outputs'][train_rows])
+    probabilities = model.predict_proba(dataset['inputs'][test_rows])
+    classes = np.asarray(model.classes_)
+
+    y = np.asarray(dataset['outputs'][test_rows])
+    ranked = classes[np.argsort(probabilities, axis=1)[:, ::-1]]
+    top1 = ranked[:, 0] == y
+    top2 = top1 | (ranked[:, 1] == y) if ranked.shape[1] > 1 else top1
+
+    return {'model': model_name, 'class_weight': class_weight_name, 'slots': slots, 'fold': fold,
+            'rows': len(test_rows), 'top1': int(top1.sum()), 'top2': int(top2.sum()),
+            'class_total': np.bincount(y, minlength=len(POSITIONS)), 'class_correct': np.bincount(y[top1], minlength=len(POSITIONS)),
+            'seconds': time.perf_counter() - start}
+
+#Pools fold results into one leaderboard row per (model, class weights, slots), best top-1 first
+def get_leaderboard(fold_results):
+    rows = []
+    for (model_name, class_weight_name, slots), results in pd.DataFrame(fold_results).groupby(['model', 'class_weight', 'slots'], sort=False):
+        fold_top1 = results['top1'] / results['rows']
+        class_total = np.sum(list(results['class_total']), axis=0)
+        class_correct = np.sum(list(results['class_correct']), axis=0)
+        row = {'model': model_name, 'class_weight': class_weight_name, 'slots': slots, 'folds': len(results), 'rows': results['rows'].sum(),
+               'top1': results['top1'].sum() / results['rows'].sum(), 'top1_fold_std': fold_top1.std(),
+               'top2': results['top2'].sum() / results['rows'].sum(), 'seconds': results['seconds'].sum()}
+        for code, pos in enumerate(POSITIONS):
+            row[f'acc_{pos}'] = class_correct[code] / class_total[code] if class_total[code] else np.nan
+        rows.append(row)
+    return pd.DataFrame(rows).sort_values(['top1', 'top2'], ascending=False, kind='stable').reset_index(drop=True)
+
+def run_sweep(dataset_path, models, class_weights, slot_subsets, num_folds=5, seed=42, workers=1, cache_folder=None):
+    cache_folder = cache_folder or dataset_path.rstrip('/') + '_sweep_cache'
+    os.makedirs(cache_folder, exist_ok=True)
+    dataset_path = get_mmap_dataset(dataset_path, cache_folder)
+    fold_path = get_fold_path(dataset_path, cache_folder, num_folds, seed)
+
+    jobs = [(dataset_path, fold_path, model_name, class_weight_name, slots, fold, seed)
+            for model_name in models for class_weight_name in class_weights for slots in slot_subsets for fold in range(num_folds)]
+    fold_results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_fold, *job) for job in jobs]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            fold_results.append(result)
+            sys.stderr.write(f"\r[sweep] {done}/{len(jobs)} folds  last: {result['model']} {result['class_weight']} slots={result['slots']} "
+                             f"fold {result['fold']} top-1 {result['top1'] / max(result['rows'], 1):.3f}   ")
+    sys.stderr.write('\n')
+
+    job_order = {job[2:6]: i for i, job in enumerate(jobs)}
+    fold_results.sort(key=lambda result: job_order[(result['model'], result['class_weight'], result['slots'], result['fold'])])
+    return get_leaderboard(fold_results)
+
+def main():
+    parser = argparse.ArgumentParser(description='Cross-validated sweep over pick-position models')
+    parser.add_argument('--dataset', default=DEFAULT_DATASET, help='draft_dataset store written by model_preprocessing.py')
+    parser.add_argument('--models', default='random_forest', help=f'comma separated, from {MODELS}')
+    parser.add_argument('--class-weights', default='none,qb4_te5', help=f'comma separated, from {list(CLASS_WEIGHT_PRESETS)}')
+    parser.add_argument('--slots', default='all,1', help="comma separated subsets of draft slots: 'all', '1', '1+12', ...")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--cache', help='folder for cached folds (default: <dataset>_sweep_cache)')
+    parser.add_argument('--out', default='leaderboard.csv')
+    args = parser.parse_args()
+
+    for name, values, choices in [('model', args.models, MODELS), ('class weight', args.class_weights, CLASS_WEIGHT_PRESETS)]:
+        for value in values.split(','):
+            if value not in choices:
+                parser.error(f'unknown {name} {value}, expected one of {list(choices)}')
+
+    leaderboard = run_sweep(args.dataset, args.models.split(','), args.class_weights.split(','), args.slots.split(','),
+                            args.folds, args.seed, args.workers, args.cache)
+    leaderboard.to_csv(args.out, index=False)
+    print(leaderboard.to_string(float_format=lambda value: f'{value:.3f}'))
+    print(f'Leaderboard written to {args.out}')
+
+
+if __name__ == "__main__":
+    main()